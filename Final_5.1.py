@@ -5,6 +5,29 @@ import os
 import sys
 import string
 
+from answer_index import AnswerIndexWorker
+from canvas import Canvas
+from content import Content, ContentWatcher
+from control_server import PUBLISH_INTERVAL, ControlServer, KioskMetrics
+from display_list import DisplayList, centered
+from effects import HAVE_NUMPY, Glitcher, tail_rect
+from font_fallback import DEFAULT_FONT_PATH, DEFAULT_FONT_SCALE, FontChain, fallback_paths
+from frame_governor import FrameGovernor
+from gc_policy import GCPolicy
+from input_pipeline import InputPipeline
+from mash import MashDetector, layout_inverse
+from recap import RecapRenderer
+from scheduler import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, FrameScheduler
+from session_log import RemoteSessionLog, SessionLog
+from state_mirror import StateMirror, segment_name
+from transitions import CrossFade
+from typing_dynamics import KeystrokeLog, add_dynamics
+from watchdog import Heartbeat, SessionJournal
+from surface_cache import DiskSurfaceCache
+from surface_pool import SurfacePool
+from text_backend import HAVE_FREETYPE, make_text_backend
+from text_cache import TextCache
+
 # ================= CONFIGURABLE PART =================
 
 # Path to your OTF font file
@@ -42,8 +65,110 @@ QUESTIONS = [
 WAITING_MODE_SENTENCE_INTERVAL = 2  # seconds between sentences in Waiting Mode
 INPUT_MODE_TIMEOUT = 3  # seconds with no input in free input phase before saving and transitioning
 QUESTION_MODE_TIMEOUT = 3  # seconds with no input in Question Mode before recording answer and moving on
+QUESTION_MODE_RESET = 30  # seconds without any key press in Question Mode before going back to Waiting Mode
 THANK_YOU_DURATION = 10  # seconds to display thank you screen
 
+# Cross-fade between waiting sentences
+FADE_DURATION = 0.6  # seconds the cross-fade takes
+FADE_STEPS = 12  # number of pre-composed fade frames
+FADE_BUILD_BUDGET = 2  # at most this many fade frames are composed per frame
+
+# Lines shown on the thank you screen
+THANK_YOU_LINES = ["Humm...", "Intervention Made.", "Bye."]
+
+# Content file that overrides SENTENCES, QUESTIONS and the timings above.
+# It is re-read while the kiosk runs; changes are applied between sessions.
+CONTENT_PATH = "content.json"
+CONTENT_POLL_INTERVAL = 1.0  # seconds between checks of the content file's modification time
+
+# Fonts tried, in order, for characters the visitor types that FONT_PATH has no glyph for
+# (installed system fonts such as Noto CJK are appended automatically)
+FALLBACK_FONT_PATHS = [FONT_PATH, "TypeLightSans-KV84p.otf"]
+
+# How typed text is drawn: "atlas" composes it from glyphs rasterized once,
+# "freetype" rasterizes straight onto the screen, "font" renders a new surface
+# per frame with pygame.font and blits it
+TEXT_BACKEND = "atlas"
+
+# Glitch effects on freshly typed characters (needs NumPy; set to () to turn them off)
+GLITCH_EFFECTS = ("jitter", "channel_shift", "scanline_tear")
+GLITCH_CHARS = 4  # how many of the last typed characters glitch
+GLITCH_DURATION = 0.35  # seconds a key press keeps glitching, fading out
+GLITCH_STRENGTH = 4  # maximum displacement in pixels
+
+# Frame rate per situation: while keys are arriving, while a question or input is open
+# without typing, while a fade runs, and while idle in Waiting / Thank You Mode
+FRAME_RATE_POLICY = {"typing": 60, "input": 30, "fade": 30, "idle": 5}
+TYPING_WINDOW = 0.5  # seconds after a key press that still count as typing
+
+# Keys the keyboard-mash detector looks back over; question graph edges can branch on
+# its score with "min_mash" / "max_mash"
+MASH_WINDOW = 24
+
+# Where typed text is logged: every free input and answer as a line, and every session as JSON
+OUTPUT_FILE = "collected_input.txt"
+SESSIONS_FILE = "sessions.jsonl"
+
+# Set by stations.py when several kiosks run from one host: the station's name, the display
+# it fills, and the address of the launcher's log writer, which then writes the log files
+# for every station
+STATION = os.environ.get("KIOSK_STATION", "")
+DISPLAY_INDEX = int(os.environ.get("KIOSK_DISPLAY", "0"))
+FULLSCREEN = os.environ.get("KIOSK_FULLSCREEN", "1")!="0"
+LOG_ADDRESS = os.environ.get("KIOSK_LOG_ADDRESS")
+LOG_AUTHKEY = bytes.fromhex(os.environ.get("KIOSK_LOG_AUTHKEY", ""))
+
+# For watchdog.py: the main loop writes a heartbeat when the watchdog asks for one, and
+# journals the session in progress (at most every JOURNAL_INTERVAL seconds) so a
+# restarted kiosk resumes it
+HEARTBEAT_FILE = os.environ.get("KIOSK_HEARTBEAT")
+JOURNAL_FILE = f"session_journal-{STATION}.json" if STATION else "session_journal.json"
+JOURNAL_INTERVAL = 0.5
+
+# Mirror mode, question, input and frame times into shared memory every frame, for
+# the operator console (python state_mirror.py)
+MIRROR_STATE = True
+
+# Local HTTP endpoint for metrics and control (control_server.py), e.g.
+# KIOSK_CONTROL_PORT=8765; 0 runs no server. Stations on one host need a port each.
+CONTROL_PORT = int(os.environ.get("KIOSK_CONTROL_PORT", "0"))
+
+# Milliseconds per frame that deferred work (log flushing, layout, cache warming) may use
+JOB_BUDGET_MS = 2
+
+# Seconds between garbage collections while the kiosk is idle (Waiting / Thank You Mode);
+# automatic collection is off while a visitor types
+GC_COLLECT_INTERVAL = 30
+
+# Show the visitor's questions and answers on the right half of the thank you screen
+SHOW_RECAP = False
+RECAP_PAGE_DURATION = 4  # seconds per page when the recap does not fit on one page
+
+# Past answers are indexed on disk so the thank you screen can echo what someone else
+# answered to one of the same questions, if it is at least ECHO_MIN_SIMILARITY alike (0..1)
+ANSWER_INDEX_FILE = "answers.sqlite"
+SHOW_ECHO = True
+ECHO_MIN_SIMILARITY = 0.3
+ECHO_TEXT = 'Someone else told me "{answer}"'
+ECHO_MAX_CHARS = 40
+
+# Resolution the frame is drawn at, and how it is scaled to the display: "hardware"
+# (SDL scales on flip), "integer" (sharp whole-factor scaling) or "smooth".
+# None draws at the display's own resolution. Lower canvases cost less per frame.
+CANVAS_SIZE = (1920, 1080)
+CANVAS_SCALING = "hardware"
+
+# Folder holding pre-rendered text surfaces so a restart does not rasterize everything again
+TEXT_CACHE_DIR = "text_cache"
+
+DEFAULT_CONTENT = Content(SENTENCES, QUESTIONS, {
+    "waiting_mode_sentence_interval": WAITING_MODE_SENTENCE_INTERVAL,
+    "input_mode_timeout": INPUT_MODE_TIMEOUT,
+    "question_mode_timeout": QUESTION_MODE_TIMEOUT,
+    "question_mode_reset": QUESTION_MODE_RESET,
+    "thank_you_duration": THANK_YOU_DURATION,
+})
+
 # ---------------- Custom Keyboard Remap ----------------
 def random_custom_layout():
     keyboardLayout = {
@@ -82,37 +207,128 @@ CUSTOM_LAYOUT = random_custom_layout()
 # ================= PYGAME PROGRAM =================
 
 def main():
+    global CUSTOM_LAYOUT  # Replaced with a new random layout after every session
     pygame.init()
 
-    screen = pygame.display.set_mode((1980, 1020))
-
-    # Set up fullscreen display with black background
-    info_object = pygame.display.Info()
-    screen_width, screen_height = info_object.current_w, info_object.current_h
-    screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
+    # Set up fullscreen display with black background; everything is drawn into
+    # the logical canvas, and positions and sizes are given in 1080p design pixels
+    canvas = Canvas(CANVAS_SIZE, CANVAS_SCALING, FULLSCREEN, display=DISPLAY_INDEX)
+    screen = canvas.surface
+    screen_width, screen_height = canvas.size
     pygame.display.set_caption("### Fullscreen Text Display ###")
 
+    # Surfaces needed again and again are borrowed from the pool; it also counts
+    # every surface allocated per frame, so steady frames can be checked to allocate none
+    surface_pool = SurfacePool(like=screen)
+
     # Create a clock to control the frame rate
     clock = pygame.time.Clock()
 
     # Load the provided OTF font for all dynamic text (waiting, free input, questions)
     try:
-        main_font = pygame.font.Font(FONT_PATH, 46)
-        question_font = pygame.font.Font(FONT_PATH, 50)
-        waiting_font = pygame.font.Font(FONT_PATH, 60)
+        main_font = pygame.font.Font(FONT_PATH, canvas.px(46))
+        question_font = pygame.font.Font(FONT_PATH, canvas.px(50))
+        waiting_font = pygame.font.Font(FONT_PATH, canvas.px(60))
     except Exception as e:
         print(f"Could not load font from {FONT_PATH}. Exiting.")
         pygame.quit()
         sys.exit()
 
+    # Typed text can contain anything, so it is drawn through a font fallback chain
+    # (glyph coverage of every font is indexed once, here)
+    fallback_font_paths = fallback_paths(FALLBACK_FONT_PATHS)
+    text_backend = TEXT_BACKEND
+    if text_backend=="freetype" and not HAVE_FREETYPE:
+        print("pygame.freetype is not available, drawing typed text with pygame.font.")
+        text_backend = "font"
+    input_font = make_text_backend(text_backend, fallback_font_paths, canvas.px(46), surface_pool)
+    answer_font = make_text_backend(text_backend, fallback_font_paths, canvas.px(50), surface_pool)
+    # Echoed past answers can contain anything a visitor typed, so they go through the fallback chain too
+    echo_font = make_text_backend(text_backend, fallback_font_paths, canvas.px(30), surface_pool)
+
     # Load the system font for the fixed prompt at the bottom
-    bottom_font = pygame.font.SysFont(None, 36)
-    recap_font = pygame.font.SysFont(None, 24)
+    bottom_font = pygame.font.SysFont(None, canvas.px(36))
+    recap_font = pygame.font.SysFont(None, canvas.px(24))
 
     # Define text color and background color
     text_color = (255, 255, 255)  # white
     bg_color = (0, 0, 0)  # black
 
+    if text_backend=="atlas":
+        # Everything a keyboard types directly is in the atlas before the first visitor arrives
+        input_font.warm(string.printable.strip(), text_color)
+        answer_font.warm(string.printable.strip(), text_color)
+        echo_font.warm(string.printable.strip(), text_color)
+
+    # The recap lays itself out once per session with the largest of these system font sizes that fits.
+    # It shows what visitors typed, so the system font is backed by the system fallback fonts
+    recap_font_paths = fallback_paths([DEFAULT_FONT_PATH])
+    recap_renderer = RecapRenderer(lambda size: FontChain(recap_font_paths, int(size * DEFAULT_FONT_SCALE)),
+                                   text_color, sizes=tuple(canvas.px(size) for size in (28, 24, 20, 18, 16)),
+                                   pool=surface_pool)
+
+    recap_size = (screen_width // 2 - canvas.px(80), screen_height - canvas.px(160))
+
+    # Glitches only touch the last few characters of the line being typed
+    glitcher = Glitcher(GLITCH_EFFECTS, max(1, canvas.px(GLITCH_STRENGTH))) if HAVE_NUMPY and GLITCH_EFFECTS else None
+
+    def glitch_input(font, text, text_rect, last_key_time):
+        if glitcher is None or last_key_time is None:
+            return
+        intensity = 1 - (time.time() - last_key_time) / GLITCH_DURATION
+        if intensity > 0:
+            glitcher.apply(screen, tail_rect(font, text, text_rect, GLITCH_CHARS), intensity)
+
+    # ---------------- Content and Text Cache ----------------
+    # The content watcher re-reads CONTENT_PATH on a background thread; the
+    # loaded version is only swapped in while no session is running.
+    content_watcher = ContentWatcher(CONTENT_PATH, DEFAULT_CONTENT, CONTENT_POLL_INTERVAL).start()
+    content = content_watcher.current
+
+    # Static strings are rasterized once and reused on every frame, and kept on
+    # disk so the next boot can load them instead of rasterizing again
+    text_cache = TextCache(disk_cache=DiskSurfaceCache(TEXT_CACHE_DIR, canvas.size), pool=surface_pool)
+    text_cache.add_font("main", main_font, FONT_PATH, canvas.px(46))
+    text_cache.add_font("question", question_font, FONT_PATH, canvas.px(50))
+    text_cache.add_font("waiting", waiting_font, FONT_PATH, canvas.px(60))
+    text_cache.add_font("bottom", bottom_font)
+
+    def question_font_name(node):
+        # Questions with their own font_size get their own font, loaded on first use
+        if node.font_size is None:
+            return "question"
+        name = f"question_{node.font_size}"
+        if name not in text_cache.fonts:
+            size = canvas.px(node.font_size)
+            text_cache.add_font(name, pygame.font.Font(FONT_PATH, size), FONT_PATH, size)
+        return name
+
+    def warm_questions(graph):
+        for node in graph.nodes:
+            text_cache.render(question_font_name(node), node.text, text_color)
+
+    def warm_content(new_content):
+        # Scheduled after a content reload: one string per step, given up if a newer version arrived
+        for font_name, texts in (("waiting", new_content.sentences), ("main", new_content.sentences)):
+            for text in texts:
+                if content is not new_content:
+                    return
+                text_cache.render(font_name, text, text_color)
+                yield
+        for node in new_content.graph.nodes:
+            if content is not new_content:
+                return
+            text_cache.render(question_font_name(node), node.text, text_color)
+            yield
+        text_cache.prune_disk()
+
+    text_cache.warm("waiting", content.sentences, text_color)
+    text_cache.warm("main", content.sentences, text_color)  # the waiting sentence stays up in Input Mode
+    warm_questions(content.graph)
+    text_cache.warm("main", THANK_YOU_LINES, text_color)
+    text_cache.prune_disk()
+    surface_pool.end_frame("startup")  # warm-up allocations are reported on their own
+
     # ================= STATE DEFINITIONS =================
     WAITING_MODE = "waiting"
     INPUT_MODE = "input_free"  # Free input phase (user types freely)
@@ -121,13 +337,138 @@ def main():
 
     mode = WAITING_MODE
 
+    # Key and text events are read in one batch per frame; text comes from TEXTINPUT
+    # so IME and compose input (e.g. fullwidth punctuation) arrives intact
+    input_pipeline = InputPipeline(CUSTOM_LAYOUT)
+    pygame.key.start_text_input()
+    # Scores the current answer's physical keys, before the layout is applied
+    mash_detector = MashDetector(MASH_WINDOW)
+    # When every character of the free input and of each answer arrived, for typing_dynamics.py
+    keystrokes = KeystrokeLog()
+
+    # Replaces the fixed 30 FPS: fast while typing, a few FPS while nothing moves
+    governor = FrameGovernor(FRAME_RATE_POLICY, TYPING_WINDOW, idle_modes=(WAITING_MODE, THANK_YOU_MODE))
+
+    # Deferred work runs between frames: frame jobs within JOB_BUDGET_MS, idle jobs in
+    # the time left before the next frame or while waiting for a visitor
+    scheduler = FrameScheduler(JOB_BUDGET_MS)
+    if LOG_ADDRESS:
+        session_log = RemoteSessionLog(LOG_ADDRESS, STATION, LOG_AUTHKEY or None)
+    else:
+        session_log = SessionLog(OUTPUT_FILE, SESSIONS_FILE)
+    # Past answers are looked up and indexed on a background thread, never in a frame
+    answer_index = AnswerIndexWorker(ANSWER_INDEX_FILE).start()
+    echo_lookup = None  # Lookup of the finished session's answers, shown in Thank You Mode
+
+    # Metrics are counted here and published to the control server's thread as a snapshot;
+    # its commands come back through a queue, so it never touches pygame or the session
+    metrics = KioskMetrics()
+    control = None
+    if CONTROL_PORT:
+        try:
+            control = ControlServer(metrics, CONTROL_PORT).start()
+            print(f"Control server on http://{control.address[0]}:{control.address[1]}")
+        except OSError as e:
+            print(f"Control server unavailable: {e}")
+    next_publish = 0.0
+    rotate_layout = False  # a layout rotation asked for during a session waits for its end
+
+    # Garbage collection only runs while nobody is typing
+    gc_policy = GCPolicy(busy_modes=(INPUT_MODE, QUESTION_MODE), idle_modes=(WAITING_MODE, THANK_YOU_MODE),
+                         collect_interval=GC_COLLECT_INTERVAL)
+
     # ---------------- Session Variables ----------------
     # Record the Q&A pairs for this session.
-    #session_q_and_a = []
+    session_q_and_a = []
+    session_start = None
+    # A journaled session older than the inactivity reset would have ended anyway
+    journal = SessionJournal(JOURNAL_FILE, JOURNAL_INTERVAL, content.question_mode_reset)
+    heartbeat = Heartbeat(HEARTBEAT_FILE) if HEARTBEAT_FILE else None
+    state_mirror = None
+    if MIRROR_STATE:
+        try:
+            state_mirror = StateMirror(segment_name(STATION))
+        except OSError as e:
+            print(f"State mirror unavailable: {e}")
+
+    def journal_state():
+        return {
+            "mode": mode,
+            "session_start": session_start,
+            "sentence": base_sentence,
+            "free_input": free_input_text,
+            "answers": list(session_q_and_a),
+            "question": content.graph[question_index].text if question_index < len(content.graph) else None,
+            "input": question_input_text,
+            "layout": "".join(CUSTOM_LAYOUT[key] for key in string.ascii_lowercase),
+            "keystrokes": keystrokes.state(),
+            # The log is only flushed after a session, so the free input and answers
+            # given so far are still queued; a crash would lose them
+            "log": session_log.state(),
+        }
+
+    def end_session(completed):
+        nonlocal echo_lookup
+        journal.clear()
+        metrics.count("sessions", completed="true" if completed else "false")
+        metrics.count("answers_logged", len(session_q_and_a))
+        # The session record is queued here and written to disk in an idle slice. It keeps
+        # the layout and which answers were remapped, so analytics.py can de-scramble them.
+        remapped = {node.text: node.remap for node in content.graph.nodes}
+        # Answers are matched on the keys that were pressed, whatever the layout made of them
+        inverse = layout_inverse(CUSTOM_LAYOUT)
+        answers = [(q, a, a.translate(inverse) if remapped.get(q, True) else a) for q, a in session_q_and_a]
+        if completed and SHOW_ECHO:
+            # Queued before this session's answers are added, so it cannot find them
+            echo_lookup = answer_index.lookup([(q, keys) for q, _, keys in answers])
+        answer_index.add(answers)
+        record = {
+            "start": session_start,
+            "end": time.time(),
+            "completed": completed,
+            "content_version": content.version,
+            "sentence": base_sentence,
+            "free_input": free_input_text,
+            "layout": "".join(CUSTOM_LAYOUT[key] for key in string.ascii_lowercase),
+            "answers": [[q, a, remapped.get(q, True)] for q, a in session_q_and_a],
+            "keystrokes": keystrokes.entries,
+        }
+        session_log.add_session(record)
+        if HAVE_NUMPY:
+            # Computed in the idle time of Thank You / Waiting Mode, before the flush writes the record
+            scheduler.submit(add_dynamics, record, name="typing dynamics", idle=True)
+        if not scheduler.pending("log flush"):
+            scheduler.submit(session_log.flush, name="log flush", priority=PRIORITY_LOW, idle=True)
+
+    def metric_gauges():
+        hits, misses = text_cache.hits, text_cache.misses
+        disk = text_cache.disk_cache
+        gauges = {
+            "scheduler_jobs_queued": [({"queue": name}, length) for name, length in scheduler.queue_lengths().items()],
+            "scheduler_budget_overruns": scheduler.overruns,
+            "log_entries_queued": session_log.pending,
+            "answer_index_requests_queued": answer_index.pending,
+            "answer_index_lookup_seconds_max": answer_index.slowest,
+            "text_cache_lookups": [({"result": "hit"}, hits), ({"result": "miss"}, misses)],
+            "text_cache_hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "disk_cache_surfaces": [({"operation": "load"}, disk.loads), ({"operation": "store"}, disk.stores)],
+            "surface_pool_surfaces": [({"source": "allocated"}, surface_pool.allocations),
+                                      ({"source": "reused"}, surface_pool.reused)],
+            "content_version": content.version,
+        }
+        pauses = gc_policy.pauses.items()
+        gauges["gc_collections"] = [({"mode": gc_mode}, count) for gc_mode, (count, _, _) in pauses]
+        gauges["gc_pause_seconds"] = [({"mode": gc_mode}, total) for gc_mode, (_, total, _) in pauses]
+        gauges["gc_pause_seconds_max"] = [({"mode": gc_mode}, longest) for gc_mode, (_, _, longest) in pauses]
+        return gauges
 
     # ---------------- Waiting Mode Variables ----------------
     last_sentence_time = time.time()
-    current_sentence = random.choice(SENTENCES)
+    current_sentence = random.choice(content.sentences)
+    next_sentence = None  # Sentence the current one will fade into
+    # Fade frames span the screen width, so every sentence pair reuses the same pooled surfaces
+    sentence_fade = CrossFade(bg_color, FADE_STEPS, FADE_DURATION, FADE_BUILD_BUDGET, pool=surface_pool,
+                              frame_size=(screen_width, waiting_font.get_height()))
 
     # ---------------- Input Mode (Free Input) Variables ----------------
     free_input_text = ""  # Stores the free input from the user
@@ -136,99 +477,214 @@ def main():
     base_sentence = ""
 
     # ---------------- Question Mode Variables ----------------
-    question_index = 0  # Tracks which question is currently being asked
+    question_index = 0  # Tracks which node of content.graph is currently being asked
     question_input_text = ""  # Stores the answer for the current question
     question_last_time = None  # Time of last key press in question mode
+    question_first_time = None  # Time of the first key press of the current answer (for typing speed)
 
     # ---------------- Thank You Mode Variable ----------------
     thank_you_start_time = None
     qr_surface = None  # Will hold the generated QR code as a pygame surface
+    thank_you_display = DisplayList()  # Thank you lines, rebuilt only when the content changes
+
+    # ---------------- Resume after a Restart ----------------
+    # A session that was running when the kiosk crashed (or the watchdog killed it)
+    # continues where the visitor was, with the same keyboard layout
+    resumed = journal.load()
+    if resumed is not None and resumed["mode"] in (INPUT_MODE, QUESTION_MODE):
+        mode = resumed["mode"]
+        session_start = resumed["session_start"]
+        base_sentence = resumed["sentence"]
+        free_input_text = resumed["free_input"]
+        session_q_and_a = [tuple(pair) for pair in resumed["answers"]]
+        question_input_text = resumed["input"]
+        CUSTOM_LAYOUT = dict(zip(string.ascii_lowercase, resumed["layout"]))
+        input_pipeline.set_layout(CUSTOM_LAYOUT)
+        keystrokes.restore(resumed["keystrokes"])
+        if "log" in resumed:
+            session_log.restore(resumed["log"])
+        # Content versions are counted per run, so the question is found again by its text
+        texts = content.graph.texts()
+        question_index = texts.index(resumed["question"]) if resumed["question"] in texts else content.graph.start
+        free_input_last_time = question_last_time = time.time()
+        question_first_time = question_last_time if question_input_text else None
+        print(f"Resumed the session in progress ({mode}, {len(session_q_and_a)} answers)")
+
+    # Everything created so far lives for the whole run; keep it out of every later collection
+    gc_policy.freeze()
 
     running = True
     while running:
+        frame_start = pygame.time.get_ticks()
+        work_start = time.perf_counter()
+
         # ---------------- Event Handling ----------------
-        for event in pygame.event.get():
+        # All key and text events of the frame are drained into one batch
+        events = pygame.event.get()
+        for event in events:
             if event.type==pygame.QUIT:
                 running = False
 
-            if event.type==pygame.KEYDOWN:
-                # Allow CTRL+C and ESC key to quit at any time
-                keys = pygame.key.get_pressed()
-                #!!!!! REMEMBER TO REMOVE ESC BEFORE PUTTING INTO PRODUCTION !!!!!
-                ########## if (keys[pygame.K_c] and (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL])) or keys[pygame.K_ESCAPE]:
-                if keys[pygame.K_c] and keys[pygame.K_LCTRL]: ############### CHANGE KEY ###################
-                    running = False
-                else:
-                    # Function to remap key based on custom layout.
-                    def remap_key(char):
-                        if char.lower() in CUSTOM_LAYOUT:
-                            # Preserve case of the original character.
-                            return CUSTOM_LAYOUT[char.lower()].upper() if char.isupper() else CUSTOM_LAYOUT[
-                                char.lower()]
-                        return char
-
-                    if mode==WAITING_MODE:
-                        # On any key press in Waiting Mode, switch to free input mode.
-                        mode = INPUT_MODE
-                        free_input_text = ""
-                        free_input_last_time = time.time()
-                        # Retain the waiting sentence that was visible.
-                        base_sentence = current_sentence
-                    elif mode==INPUT_MODE:
-                        # In free input mode, capture characters (ignoring backspace)
-                        if event.key in (pygame.K_TAB, pygame.K_DELETE, pygame.K_ESCAPE, pygame.K_BACKSPACE):
-                            pass
-                        # elif event.key==pygame.K_BACKSPACE:
-                            # pass  # No backspace allowed
-                        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
-                            # If Enter is pressed, immediately transition to Question Mode
-                            mode = QUESTION_MODE
-                            question_index = 0
-                            question_input_text = ""
-                            question_last_time = time.time()
-                        else:
-                            char = event.unicode
-                            # Remap the character if it's an alphabet letter per custom layout
-                            char = remap_key(char)
-                            free_input_text += char
-                            free_input_last_time = time.time()
-                    elif mode==QUESTION_MODE:
-                        # In question mode, capture input for the current question (ignoring backspace)
-                        if event.key in (pygame.K_TAB, pygame.K_DELETE, pygame.K_ESCAPE, pygame.K_BACKSPACE):
-                            pass
-                        elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
-                            # If Enter is pressed, immediately move to the next question
-                            question_index += 1  # Move to next question
-                            question_input_text = ""
-                            question_last_time = time.time()
-                        else:
-                            char = event.unicode
-                            # For all but the last question, remap the character; for the last question, use it as-is.
-                            if question_index != len(QUESTIONS) - 1:
-                                char = remap_key(char)
-                            question_input_text += char
-                            question_last_time = time.time()
+        batch = input_pipeline.drain(events, waiting=mode==WAITING_MODE)
+        if batch.keys:
+            governor.key_pressed(time.time())
+
+        # Allow CTRL+C to quit at any time
+        #!!!!! REMEMBER TO REMOVE ESC BEFORE PUTTING INTO PRODUCTION !!!!!
+        ########## if (keys[pygame.K_c] and (keys[pygame.K_LCTRL] or keys[pygame.K_RCTRL])) or keys[pygame.K_ESCAPE]:
+        if batch.quit: ############### CHANGE KEY (InputPipeline quit_key / quit_mod) ###################
+            running = False
+        else:
+            if batch.woke:
+                # On any key press in Waiting Mode, switch to free input mode.
+                mode = INPUT_MODE
+                free_input_text = ""
+                free_input_last_time = time.time()
+                # Retain the waiting sentence that was visible.
+                base_sentence = current_sentence
+                next_sentence = None
+                sentence_fade.cancel()
+                session_q_and_a = []
+                session_start = time.time()
+                echo_lookup = None
+                mash_detector.reset()
+                keystrokes.start(session_start)
+
+            for segment_index, segment in enumerate(batch.segments):
+                if segment_index > 0:
+                    # Every segment after the first one starts with an Enter press
+                    if mode==INPUT_MODE:
+                        # If Enter is pressed, immediately transition to Question Mode
+                        session_log.add_text(free_input_text)
+                        mode = QUESTION_MODE
+                        question_index = content.graph.start
+                        question_input_text = ""
+                        question_last_time = time.time()
+                        question_first_time = None
+                        mash_detector.reset()
+                        keystrokes.next_entry(question_last_time, enter=True)
+                    elif mode==QUESTION_MODE and question_index < len(content.graph):
+                        # If Enter is pressed, immediately move to the next question
+                        session_q_and_a.append((content.graph[question_index].text, question_input_text))
+                        session_log.add_text(question_input_text)
+                        question_index = content.graph.next_index(
+                            question_index, question_input_text,
+                            question_last_time - (question_first_time or question_last_time),
+                            mash_detector.score)
+                        question_input_text = ""
+                        question_last_time = time.time()
+                        question_first_time = None
+                        mash_detector.reset()
+                        keystrokes.next_entry(question_last_time, enter=True)
+
+                if not segment:
+                    continue
+                if mode in (INPUT_MODE, QUESTION_MODE):
+                    mash_detector.feed(segment)
+                    keystrokes.add(len(segment), time.time())
+                if mode==INPUT_MODE:
+                    # In free input mode, capture characters remapped per the custom layout (no backspace)
+                    free_input_text += input_pipeline.translate(segment)
+                    free_input_last_time = time.time()
+                elif mode==QUESTION_MODE and question_index < len(content.graph):
+                    # Remap the characters unless the question says to use the visitor's keys as-is
+                    # (by default only the last question does).
+                    question_input_text += input_pipeline.translate(segment, content.graph[question_index].remap)
+                    question_last_time = time.time()
+                    if question_first_time is None:
+                        question_first_time = question_last_time
+
+        # ---------------- Control Commands ----------------
+        # Commands from the control server are taken from its queue here, on the main thread
+        if control is not None:
+            for command in control.commands():
+                metrics.count("commands", command=command)
+                if command=="reload-content":
+                    content_watcher.request_reload()  # picked up in Waiting Mode, like a saved file
+                elif command=="rotate-layout":
+                    rotate_layout = True
+                elif command=="waiting" and mode!=WAITING_MODE:
+                    if mode in (INPUT_MODE, QUESTION_MODE):
+                        end_session(completed=False)
+                    else:
+                        rotate_layout = True  # as when the thank you screen ends by itself
+                    mode = WAITING_MODE
+                    last_sentence_time = time.time()
+                    next_sentence = None
+                    question_index = content.graph.start
+                    question_input_text = ""
+        # A new layout mid-session would scramble the visitor's keys and the recorded layout
+        if rotate_layout and mode not in (INPUT_MODE, QUESTION_MODE):
+            CUSTOM_LAYOUT = random_custom_layout()
+            input_pipeline.set_layout(CUSTOM_LAYOUT)
+            rotate_layout = False
+
+        # ---------------- Content Reload ----------------
+        # Only swap content between sessions so a visitor never sees the questions change mid-way
+        if mode==WAITING_MODE:
+            new_content = content_watcher.take_pending()
+            if new_content is not None:
+                content = new_content
+                # Keep surfaces for strings that did not change, rasterize only the new ones
+                text_cache.retain(content.strings() | set(THANK_YOU_LINES) | {base_sentence})
+                # The new strings are rasterized between frames rather than all in this one
+                scheduler.submit(warm_content, content, name="warm content", priority=PRIORITY_NORMAL, idle=True)
+                if current_sentence not in content.sentences:
+                    current_sentence = random.choice(content.sentences)
+                next_sentence = None
+                sentence_fade.cancel()
+
+        gc_policy.update(mode, time.time())
 
         # ---------------- Clear Screen ----------------
         screen.fill(bg_color)
 
         # ---------------- Mode-specific Logic and Rendering ----------------
         if mode==WAITING_MODE:
-            # Display a random sentence (centered) that changes every 5 seconds
-            sentence_surface = waiting_font.render(current_sentence, True, text_color)
-            sentence_rect = sentence_surface.get_rect(center=(screen_width // 2, screen_height // 2))
-            screen.blit(sentence_surface, sentence_rect)
-
-            # Update sentence if the interval has passed
-            if time.time() - last_sentence_time >= WAITING_MODE_SENTENCE_INTERVAL:
-                current_sentence = random.choice(SENTENCES)
-                last_sentence_time = time.time()
+            # Pick the next sentence as soon as the current one is up, so the fade
+            # frames can be composed a few at a time while the current one is shown
+            if next_sentence is None:
+                next_sentence = random.choice(content.sentences)
+                if next_sentence!=current_sentence:
+                    sentence_fade.prepare((current_sentence, next_sentence),
+                                          text_cache.render("waiting", current_sentence, text_color),
+                                          text_cache.render("waiting", next_sentence, text_color),
+                                          canvas.center)
+            sentence_fade.build()
+
+            fade_frame = None
+            if sentence_fade.running:
+                fade_frame = sentence_fade.current(time.time())
+                if fade_frame is None:
+                    # The fade just finished and the next sentence is fully shown
+                    current_sentence = next_sentence
+                    next_sentence = None
+                    last_sentence_time = time.time()
+
+            if fade_frame is not None:
+                screen.blit(*fade_frame)
+            else:
+                # Display a random sentence (centered) that changes every few seconds
+                sentence_surface = text_cache.render("waiting", current_sentence, text_color)
+                sentence_rect = sentence_surface.get_rect(center=canvas.center)
+                screen.blit(sentence_surface, sentence_rect)
+
+            # Update sentence if the interval has passed: cross-fade if the frames are
+            # ready, otherwise (or if the same sentence was picked) switch directly
+            if not sentence_fade.running and next_sentence is not None and \
+                    time.time() - last_sentence_time >= content.waiting_mode_sentence_interval:
+                if next_sentence!=current_sentence and sentence_fade.ready:
+                    sentence_fade.start(time.time())
+                else:
+                    current_sentence = next_sentence
+                    next_sentence = None
+                    last_sentence_time = time.time()
 
         elif mode==INPUT_MODE:
             # ---------------- Updated Input Mode Display ----------------
             # Display the base waiting sentence (positioned above center)
-            base_surface = main_font.render(base_sentence, True, text_color)
-            base_rect = base_surface.get_rect(center=(screen_width // 2, screen_height // 2 - 75))
+            base_surface = text_cache.render("main", base_sentence, text_color)
+            base_rect = base_surface.get_rect(center=canvas.at(dy=-75))
             screen.blit(base_surface, base_rect)
 
             # Display the extra line "Don't worry" below the base sentence
@@ -237,24 +693,26 @@ def main():
             #screen.blit(worry_surface, worry_rect)
 
             # Display the free input text (positioned below the two lines)
-            input_surface = main_font.render(free_input_text, True, text_color)
-            input_rect = input_surface.get_rect(center=(screen_width // 2, screen_height // 2 + 50))
-            screen.blit(input_surface, input_rect)
+            input_rect = input_font.draw(screen, free_input_text, text_color, center=canvas.at(dy=50))
+            glitch_input(input_font, free_input_text, input_rect, free_input_last_time)
 
             # If no input for INPUT_MODE_TIMEOUT seconds, record the free input and transition to Question Mode
-            if free_input_last_time and (time.time() - free_input_last_time >= INPUT_MODE_TIMEOUT):
-                #if free_input_text.strip()!="":
-                    #append_to_file(OUTPUT_FILE, free_input_text)
+            if free_input_last_time and (time.time() - free_input_last_time >= content.input_mode_timeout):
+                session_log.add_text(free_input_text)
                 # Transition to Question Mode
                 mode = QUESTION_MODE
-                question_index = 0
+                question_index = content.graph.start
                 question_input_text = ""
                 question_last_time = time.time()
+                question_first_time = None
+                mash_detector.reset()
+                keystrokes.next_entry(question_last_time, enter=False)
 
         elif mode==QUESTION_MODE:
             # Check if there are still questions to ask
-            if question_index < len(QUESTIONS):
-                current_question = QUESTIONS[question_index]
+            if question_index < len(content.graph):
+                question_node = content.graph[question_index]
+                current_question = question_node.text
                 question_color = text_color
                 # Use 1-indexing for displaying question number:
                 #if (question_index + 1) in (3, 7, 8):
@@ -262,14 +720,14 @@ def main():
                 #else:
                     #question_color = text_color
                 # Display the current question (positioned above center)
-                question_surface = question_font.render(current_question, True, question_color)
-                question_rect = question_surface.get_rect(center=(screen_width // 2, screen_height // 2 - 50))
+                question_surface = text_cache.render(question_font_name(question_node), current_question, question_color)
+                question_rect = question_surface.get_rect(center=canvas.at(dy=-50))
                 screen.blit(question_surface, question_rect)
 
                 # Display the user's answer input (positioned below the question)
-                answer_surface = question_font.render(question_input_text, True, text_color)
-                answer_rect = answer_surface.get_rect(center=(screen_width // 2, screen_height // 2 + 50))
-                screen.blit(answer_surface, answer_rect)
+                answer_rect = answer_font.draw(screen, question_input_text, text_color, center=canvas.at(dy=50))
+                if question_first_time is not None:
+                    glitch_input(answer_font, question_input_text, answer_rect, question_last_time)
 
                 # If no input for QUESTION_MODE_TIMEOUT seconds and some text has been entered,
                 # record the answer and move on to the next question.
@@ -283,21 +741,35 @@ def main():
                         #question_last_time = time.time()
                     ## If no text has been entered, wait (do not advance)
 
-                # Global inactivity timeout: if 30 seconds have passed since the question started, reset to Waiting Mode
-                if time.time() - question_last_time >= 30:
+                # Global inactivity timeout: if question_mode_reset seconds (30 by default) pass without a key press, reset to Waiting Mode
+                if time.time() - question_last_time >= content.question_mode_reset:
+                    end_session(completed=False)
                     mode = WAITING_MODE
                     last_sentence_time = time.time()
-                    question_index = 0
+                    question_index = content.graph.start
                     question_input_text = ""
-                # Otherwise, if no key press for QUESTION_MODE_TIMEOUT seconds and some text has been entered, move on
-                elif time.time() - question_last_time >= QUESTION_MODE_TIMEOUT:
+                # Otherwise, if no key press for the question's timeout and some text has been entered, move on
+                elif time.time() - question_last_time >= (question_node.timeout or content.question_mode_timeout):
                     if question_input_text.strip()!="":
-                        question_index += 1  # Move to next question
+                        # Record the Q&A pair for this session.
+                        session_q_and_a.append((current_question, question_input_text))
+                        session_log.add_text(question_input_text)
+                        question_index = content.graph.next_index(
+                            question_index, question_input_text, question_last_time - question_first_time,
+                            mash_detector.score)
                         question_input_text = ""
                         question_last_time = time.time()
+                        question_first_time = None
+                        mash_detector.reset()
+                        keystrokes.next_entry(question_last_time, enter=False)
 
             else:
                 # All questions have been answered; switch to Thank You mode.
+                end_session(completed=True)
+                if SHOW_RECAP and session_q_and_a:
+                    # Lay the recap out between frames, before the first thank you frame needs it
+                    scheduler.submit(recap_renderer.render, list(session_q_and_a), recap_size,
+                                     name="recap layout", priority=PRIORITY_HIGH)
                 mode = THANK_YOU_MODE
                 thank_you_start_time = time.time()
                 qr_surface = None  # Ensure QR code gets generated
@@ -305,17 +777,31 @@ def main():
         elif mode==THANK_YOU_MODE:
             # ---------------- Thank You Mode Display ----------------
             # Display a "thank you" message in the center of the screen
-            thank_you_surface2 = main_font.render("Humm...", True, text_color)
-            thank_you_rect2 = thank_you_surface2.get_rect(center=(screen_width // 2, screen_height // 2 - 50))
-            screen.blit(thank_you_surface2, thank_you_rect2)
-
-            thank_you_surface4 = main_font.render("Intervention Made.", True, text_color)
-            thank_you_rect4 = thank_you_surface4.get_rect(center=(screen_width // 2, screen_height // 2 + 50))
-            screen.blit(thank_you_surface4, thank_you_rect4)
-
-            thank_you_surface3 = main_font.render("Bye.", True, text_color)
-            thank_you_rect3 = thank_you_surface3.get_rect(center=(screen_width // 2, screen_height // 2 + 150))
-            screen.blit(thank_you_surface3, thank_you_rect3)
+            # (in the center of the left half when the recap takes the right half)
+            recap_page = None
+            if SHOW_RECAP and session_q_and_a:
+                recap_page = recap_renderer.page_at(session_q_and_a, recap_size,
+                                                    time.time() - thank_you_start_time, RECAP_PAGE_DURATION)
+            if not thank_you_display.is_current((content.version, recap_page)):
+                thank_you_x = screen_width // 4 if recap_page is not None else screen_width // 2
+                items = [
+                    centered(text_cache.render("main", THANK_YOU_LINES[0], text_color),
+                             (thank_you_x, canvas.at(dy=-50)[1])),
+                    centered(text_cache.render("main", THANK_YOU_LINES[1], text_color),
+                             (thank_you_x, canvas.at(dy=50)[1])),
+                    centered(text_cache.render("main", THANK_YOU_LINES[2], text_color),
+                             (thank_you_x, canvas.at(dy=150)[1])),
+                ]
+                if recap_page is not None:
+                    # The whole recap page is a single pre-rendered surface
+                    items.append((recap_page, (screen_width // 2 + canvas.px(40), canvas.px(80))))
+                thank_you_display.rebuild((content.version, recap_page), items)
+            thank_you_display.draw(screen)
+            echo = echo_lookup.best(ECHO_MIN_SIMILARITY) if echo_lookup is not None else None
+            if echo is not None:
+                echo_x = screen_width // 4 if recap_page is not None else screen_width // 2
+                echo_font.draw(screen, ECHO_TEXT.format(answer=echo[2][:ECHO_MAX_CHARS]), text_color,
+                               center=(echo_x, canvas.at(dy=250)[1]))
 
             # Generate the QR code only once
             '''
@@ -372,12 +858,13 @@ def main():
             '''
 
             # After THANK_YOU_DURATION seconds, return to Waiting Mode and reset session data
-            if time.time() - thank_you_start_time >= THANK_YOU_DURATION:
-                global CUSTOM_LAYOUT  # Ensure you declare it as global so you can reassign it
+            if time.time() - thank_you_start_time >= content.thank_you_duration:
                 CUSTOM_LAYOUT = random_custom_layout()  # Generate a new custom layout
+                input_pipeline.set_layout(CUSTOM_LAYOUT)
                 mode = WAITING_MODE
                 last_sentence_time = time.time()
-                current_sentence = random.choice(SENTENCES)
+                current_sentence = random.choice(content.sentences)
+                next_sentence = None
                 # Reset session data for next session
                 #session_q_and_a = []
                 #qr_surface = None
@@ -391,14 +878,57 @@ def main():
             prompt_text = ""
         elif mode==THANK_YOU_MODE:
             prompt_text = ""
-        prompt_surface = bottom_font.render(prompt_text, True, text_color)
-        prompt_rect = prompt_surface.get_rect(midbottom=(screen_width // 2, screen_height - 10))
-        screen.blit(prompt_surface, prompt_rect)
+        if prompt_text:
+            prompt_surface = text_cache.render("bottom", prompt_text, text_color)
+            prompt_rect = prompt_surface.get_rect(midbottom=(screen_width // 2, screen_height - canvas.px(10)))
+            screen.blit(prompt_surface, prompt_rect)
 
-        # ---------------- Update Display and Tick the Clock ----------------
-        pygame.display.flip()
-        clock.tick(30)  # Limit to 30 FPS
+        # The session in progress is journaled in a frame job, for a restart
+        if mode in (INPUT_MODE, QUESTION_MODE) and journal.changed(
+                (mode, question_index, len(session_q_and_a), free_input_text, question_input_text)):
+            scheduler.submit(journal.save, journal_state(), name="journal", priority=PRIORITY_LOW)
 
+        # ---------------- Update Display and Tick the Clock ----------------
+        canvas.present()
+
+        # Deferred jobs get the frame's job budget, idle jobs what is left before the next frame
+        slack_ms = 1000 / governor.policy[governor.state] - (pygame.time.get_ticks() - frame_start)
+        scheduler.run(slack_ms, idle=mode==WAITING_MODE)
+        surface_pool.end_frame(mode)
+        # What the frame cost, without the wait for the frame rate that tick() adds
+        work_ms = (time.perf_counter() - work_start) * 1000
+        governor.tick(clock, mode, sentence_fade.running, time.time())
+        if heartbeat is not None:
+            heartbeat.beat(mode)
+        metrics.frame(mode, work_ms)
+        if control is not None and time.time() >= next_publish:
+            metrics.publish(mode, metric_gauges())
+            next_publish = time.time() + PUBLISH_INTERVAL
+        if state_mirror is not None:
+            asking = mode==QUESTION_MODE and question_index < len(content.graph)
+            state_mirror.update(mode, question_index, content.graph[question_index].text if asking else "",
+                                free_input_text if mode==INPUT_MODE else question_input_text if asking else "",
+                                len(session_q_and_a), work_ms, clock.get_fps(), governor.state)
+
+    content_watcher.stop()
+    session_log.flush()
+    session_log.close()
+    if heartbeat is not None:
+        heartbeat.close()
+    if state_mirror is not None:
+        state_mirror.close()
+    if control is not None:
+        control.close()
+    answer_index.close()
+    gc_policy.stop()
+    print(canvas.describe())
+    print(governor.report())
+    print(surface_pool.report())
+    print(gc_policy.report())
+    print(scheduler.report())
+    print(answer_index.report())
+    if control is not None:
+        print(control.report())
     pygame.quit()
 
 
@@ -5,6 +5,10 @@ import os
 import sys
 import string
 
+from display_list import DisplayList, centered
+from font_fallback import DEFAULT_FONT_PATH, DEFAULT_FONT_SCALE, FontChain, fallback_paths
+from recap import RecapRenderer
+
 # ================= CONFIGURABLE PART =================
 
 # Path to your OTF font file
@@ -35,6 +39,7 @@ WAITING_MODE_SENTENCE_INTERVAL = 5  # seconds between sentences in Waiting Mode
 INPUT_MODE_TIMEOUT = 2              # seconds with no input in free input phase before saving and transitioning
 QUESTION_MODE_TIMEOUT = 2           # seconds with no input in Question Mode before recording answer and moving on
 THANK_YOU_DURATION = 15              # seconds to display thank you screen
+RECAP_PAGE_DURATION = 5             # seconds per page when the Q&A recap does not fit on one page
 
 # ---------------- Custom Keyboard Remap ----------------
 def random_custom_layout():
@@ -101,6 +106,13 @@ def main():
     text_color = (255, 255, 255)  # white
     bg_color = (0, 0, 0)          # black
 
+    # Lays the Q&A recap out once per session, wrapped into columns or pages that fit below the thank you line.
+    # Answers can contain any character, so the system font is backed by the system fallback fonts
+    recap_font_paths = fallback_paths([DEFAULT_FONT_PATH])
+    recap_renderer = RecapRenderer(lambda size: FontChain(recap_font_paths, int(size * DEFAULT_FONT_SCALE)),
+                                   text_color, sizes=(36, 30, 24, 20, 16))
+    recap_size = (screen_width - 160, screen_height // 2 - 100)
+
     # ================= STATE DEFINITIONS =================
     WAITING_MODE = "waiting"
     INPUT_MODE = "input_free"      # Free input phase (user types freely)
@@ -129,6 +141,8 @@ def main():
 
     # ---------------- Thank You Mode Variable ----------------
     thank_you_start_time = None
+    thank_you_display = DisplayList()  # Thank you line and Q&A recap, rebuilt once per session
+    countdown_display = DisplayList()  # Countdown line, rebuilt once per second
 
     running = True
     while running:
@@ -236,34 +250,32 @@ def main():
                 thank_you_start_time = time.time()
 
         elif mode == THANK_YOU_MODE:
-            # Display a "thank you" message (above center)
-            thank_you_surface = main_font.render("Thank you for talking with me", True, text_color)
-            thank_you_rect = thank_you_surface.get_rect(center=(screen_width // 2, screen_height // 2 - 150))
-            screen.blit(thank_you_surface, thank_you_rect)
-
-            # Display the Q&A text using the system font for clarity
-            qna_lines = []
-            for q, a in session_q_and_a:
-                qna_lines.append(q)
-                qna_lines.append("Your input: " + a)
-                qna_lines.append("")  # blank line for spacing
-
-            y_text = screen_height // 2  # Starting vertical position for Q&A text
-            for line in qna_lines:
-                line_surface = bottom_font.render(line, True, text_color)
-                line_rect = line_surface.get_rect(center=(screen_width // 2, y_text))
-                screen.blit(line_surface, line_rect)
-                y_text += line_surface.get_height() + 5
+            # The thank you line and the Q&A recap only change once per session (or page),
+            # so they are laid out when the session ends and drawn as one batch.
+            recap_page = None
+            if session_q_and_a:
+                # Display the Q&A text using the system font for clarity
+                recap_page = recap_renderer.page_at(session_q_and_a, recap_size,
+                                                    time.time() - thank_you_start_time, RECAP_PAGE_DURATION)
+            if not thank_you_display.is_current((thank_you_start_time, recap_page)):
+                # Display a "thank you" message (above center)
+                items = [centered(main_font.render("Thank you for talking with me", True, text_color),
+                                  (screen_width // 2, screen_height // 2 - 150))]
+                if recap_page is not None:
+                    items.append((recap_page, (80, screen_height // 2 - 20)))
+                thank_you_display.rebuild((thank_you_start_time, recap_page), items)
+            thank_you_display.draw(screen)
 
             # Countdown Timer
             remaining = int(THANK_YOU_DURATION - (time.time() - thank_you_start_time))
-            if remaining > 1:
-                countdown_text = f"Your session will end in {remaining} seconds"
-            else:
-                countdown_text = f"Your session will end in {remaining} second"
-            countdown_surface = bottom_font.render(countdown_text, True, text_color)
-            countdown_rect = countdown_surface.get_rect(center=(screen_width // 2, screen_height - 40))
-            screen.blit(countdown_surface, countdown_rect)
+            if not countdown_display.is_current(remaining):
+                if remaining > 1:
+                    countdown_text = f"Your session will end in {remaining} seconds"
+                else:
+                    countdown_text = f"Your session will end in {remaining} second"
+                countdown_surface = bottom_font.render(countdown_text, True, text_color)
+                countdown_display.rebuild(remaining, [centered(countdown_surface, (screen_width // 2, screen_height - 40))])
+            countdown_display.draw(screen)
 
             if time.time() - thank_you_start_time >= THANK_YOU_DURATION:
                 mode = WAITING_MODE
@@ -0,0 +1,386 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+from collections import Counter
+from multiprocessing import Pool
+
+from mash import ALPHABETICAL_LAYOUT, layout_inverse, mash_score, repeated_runs
+from session_log import record_answers
+
+# ================= INPUT ANALYTICS =================
+# Statistics over what visitors typed, for collected_input.txt (one free input
+# or answer per line) and for sessions.jsonl (one session record per line):
+#
+#   - length distribution and character histogram of the typed lines
+#   - keyboard-mash score of every line (see mash.py) and how many look mashed
+#   - repeated runs ("pppp", "ephyoephyoephyo") and the units that repeat most
+#   - per session: completion, answers, duration, and mash score per answer
+#
+# Files are memory-mapped and read line by line, so nothing is loaded whole and
+# memory stays bounded on archives of any size: every statistic is a counter or
+# a histogram, and the repeated-unit counter is pruned to its most common
+# entries. With --workers, a file is cut into newline-aligned chunks that are
+# scanned in separate processes and the partial statistics are merged.
+#
+# Mash scores are computed on the keys that were pressed. Session records carry
+# their keyboard layout, so answers are de-scrambled automatically; for plain
+# text files give the layout with --layout ("alphabetical" for the early
+# sessions typed with the fixed Final_5.0 layout, or the 26 letters typed by the
+# keys a-z).
+#
+#   python analytics.py [collected_input.txt] [sessions.jsonl] [--layout alphabetical]
+#                       [--lines] [--workers 4] [--chunk-mb 64] [--json]
+
+MASH_THRESHOLD = 0.6  # lines scoring at least this count as mashed
+MASH_BINS = 10
+DURATION_BIN = 10  # seconds per session duration bin
+UNIT_LIMIT = 1000  # repeated units kept when the counter is pruned
+TOP = 10  # entries shown per histogram in the text report
+CHUNK_MB = 64
+
+
+def layout_string(layout):
+    """
+    The 26-letter form of a --layout argument, or None.
+    """
+    if layout is None:
+        return None
+    if layout=="alphabetical":
+        return "".join(ALPHABETICAL_LAYOUT[key] for key in "abcdefghijklmnopqrstuvwxyz")
+    if len(layout)!=26 or not layout.isalpha() or len(set(layout.lower()))!=26:
+        raise argparse.ArgumentTypeError("layout must be 'alphabetical' or 26 distinct letters")
+    return layout.lower()
+
+
+class TextStats:
+    """
+    Mergeable statistics over typed lines.
+    """
+
+    def __init__(self):
+        self.lines = 0
+        self.chars = 0
+        self.lengths = Counter()
+        self.characters = Counter()
+        self.mash_bins = [0] * MASH_BINS
+        self.mash_total = 0.0
+        self.mashed = 0
+        self.with_runs = 0
+        self.units = Counter()
+
+    def add(self, text, keys):
+        """
+        Adds one line: text as stored, keys as pressed (text de-scrambled).
+        """
+        self.lines += 1
+        self.chars += len(text)
+        self.lengths[len(text)] += 1
+        self.characters.update(text)
+        score = mash_score(keys)
+        self.mash_total += score
+        self.mash_bins[min(int(score * MASH_BINS), MASH_BINS - 1)] += 1
+        if score >= MASH_THRESHOLD:
+            self.mashed += 1
+        runs = repeated_runs(keys)
+        if runs:
+            self.with_runs += 1
+            for start, period, _ in runs:
+                self.units[keys[start:start + period]] += 1
+            self._prune()
+        return score, runs
+
+    def _prune(self):
+        if len(self.units) > 2 * UNIT_LIMIT:
+            self.units = Counter(dict(self.units.most_common(UNIT_LIMIT)))
+
+    def merge(self, other):
+        self.lines += other.lines
+        self.chars += other.chars
+        self.lengths.update(other.lengths)
+        self.characters.update(other.characters)
+        self.mash_bins = [a + b for a, b in zip(self.mash_bins, other.mash_bins)]
+        self.mash_total += other.mash_total
+        self.mashed += other.mashed
+        self.with_runs += other.with_runs
+        self.units.update(other.units)
+        self._prune()
+        return self
+
+    def summary(self):
+        return {
+            "lines": self.lines,
+            "characters": self.chars,
+            "mean_length": self.chars / self.lines if self.lines else 0.0,
+            "median_length": _median(self.lengths),
+            "lengths": dict(sorted(self.lengths.items())),
+            "character_histogram": dict(self.characters.most_common()),
+            "mean_mash": self.mash_total / self.lines if self.lines else 0.0,
+            "mashed_lines": self.mashed,
+            "mash_histogram": self.mash_bins,
+            "lines_with_runs": self.with_runs,
+            "repeated_units": dict(self.units.most_common(TOP * 5)),
+        }
+
+
+class SessionStats:
+    """
+    Mergeable statistics over session records, with the typed text in .text.
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.completed = 0
+        self.answers = 0
+        self.unreadable = 0
+        self.untimed = 0  # records without a numeric start and end
+        self.bad_answers = 0  # answers that are not [question, text(, remapped)], skipped
+        self.duration_total = 0.0
+        self.durations = Counter()  # DURATION_BIN second bins
+        self.text = TextStats()
+
+    def add(self, record):
+        self.sessions += 1
+        self.completed += bool(record.get("completed"))
+        answers, bad_answers = record_answers(record)
+        self.answers += len(answers)
+        self.bad_answers += bad_answers
+        start, end = record.get("start"), record.get("end")
+        if not all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in (start, end)):
+            self.untimed += 1
+            return
+        duration = max(0.0, end - start)
+        self.duration_total += duration
+        self.durations[int(duration // DURATION_BIN) * DURATION_BIN] += 1
+
+    def merge(self, other):
+        self.sessions += other.sessions
+        self.completed += other.completed
+        self.answers += other.answers
+        self.unreadable += other.unreadable
+        self.untimed += other.untimed
+        self.bad_answers += other.bad_answers
+        self.duration_total += other.duration_total
+        self.durations.update(other.durations)
+        self.text.merge(other.text)
+        return self
+
+    def summary(self):
+        timed = self.sessions - self.untimed
+        return {
+            "sessions": self.sessions,
+            "completed": self.completed,
+            "unreadable": self.unreadable,
+            "untimed": self.untimed,
+            "bad_answers": self.bad_answers,
+            "answers_per_session": self.answers / self.sessions if self.sessions else 0.0,
+            "mean_duration": self.duration_total / timed if timed else 0.0,
+            "median_duration": _median(self.durations),
+            "durations": dict(sorted(self.durations.items())),
+            "text": self.text.summary(),
+        }
+
+
+def _median(histogram):
+    total = sum(histogram.values())
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen * 2 >= total:
+            return value
+    return 0
+
+
+def iter_lines(mm, start, end):
+    """
+    Yields the decoded lines of mm[start:end] without their newlines.
+    """
+    pos = start
+    while pos < end:
+        stop = mm.find(b"\n", pos, end)
+        if stop < 0:
+            stop = end
+        yield mm[pos:stop].decode("utf-8", errors="replace").rstrip("\r")
+        pos = stop + 1
+
+
+def chunk_ranges(path, chunk_bytes):
+    """
+    Splits the file into (start, end) byte ranges of about chunk_bytes that end
+    on a newline.
+    """
+    size = os.path.getsize(path)
+    if size==0:
+        return []
+    ranges = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = 0
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                newline = mm.find(b"\n", end)
+                end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def session_entries(record, layout=None):
+    """
+    Yields (label, text, keys) for the free input and every answer of a session
+    record. Remapped text is de-scrambled with the record's layout when it has
+    one, otherwise with layout.
+    """
+    if isinstance(record.get("layout"), (str, dict)) and record["layout"]:
+        layout = record["layout"]
+    inverse = layout_inverse(layout) if layout else None
+
+    def keys(text, remapped=True):
+        return text.translate(inverse) if remapped and inverse else text
+
+    free_input = record.get("free_input")
+    if isinstance(free_input, str) and free_input.strip():
+        yield "free input", free_input, keys(free_input)
+    for question, text, remapped in record_answers(record)[0]:
+        yield question, text, keys(text, remapped)
+
+
+def scan_chunk(path, start, end, sessions, layout):
+    """
+    Scans one byte range of a file. Returns TextStats, or SessionStats for a
+    session log. Runs in the worker processes.
+    """
+    inverse = layout_inverse(layout) if layout else None
+    stats = SessionStats() if sessions else TextStats()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter_lines(mm, start, end):
+            if not sessions:
+                if line.strip():
+                    stats.add(line, line.translate(inverse) if inverse else line)
+                continue
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                stats.unreadable += 1
+                continue
+            stats.add(record)
+            for _, text, keys in session_entries(record, layout):
+                stats.text.add(text, keys)
+    return stats
+
+
+def scan_file(path, layout=None, workers=1, chunk_bytes=CHUNK_MB << 20):
+    """
+    Statistics for one file, scanned in chunks by workers processes.
+    """
+    sessions = path.endswith(".jsonl")
+    tasks = [(path, start, end, sessions, layout) for start, end in chunk_ranges(path, chunk_bytes)]
+    stats = SessionStats() if sessions else TextStats()
+    if workers > 1 and len(tasks) > 1:
+        with Pool(min(workers, len(tasks))) as pool:
+            for partial in pool.starmap(scan_chunk, tasks, chunksize=1):
+                stats.merge(partial)
+    else:
+        for task in tasks:
+            stats.merge(scan_chunk(*task))
+    return stats
+
+
+def print_lines(path, layout=None, out=sys.stdout):
+    """
+    Prints every line (or every answer of every session) with its mash score,
+    repeated runs, and the de-scrambled keys where they differ from the text.
+    """
+    sessions = path.endswith(".jsonl")
+    inverse = layout_inverse(layout) if layout else None
+    if os.path.getsize(path)==0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for number, line in enumerate(iter_lines(mm, 0, len(mm)), 1):
+            if not line.strip():
+                continue
+            if sessions:
+                try:
+                    entries = list(session_entries(json.loads(line), layout))
+                except (ValueError, AttributeError):  # not JSON, or not an object
+                    print(f"{path}:{number}: unreadable session record", file=out)
+                    continue
+            else:
+                entries = [(None, line, line.translate(inverse) if inverse else line)]
+            for label, text, keys in entries:
+                runs = " ".join(f"{keys[start:start + period]}x{length // period}"
+                                for start, period, length in repeated_runs(keys))
+                prefix = f"{path}:{number}" + (f" [{label}]" if label else "")
+                descrambled = f"  -> {keys!r}" if keys!=text else ""
+                print(f"{prefix}  mash {mash_score(keys):.2f}  {text!r}{descrambled}"
+                      + (f"  runs {runs}" if runs else ""), file=out)
+
+
+def text_report(summary):
+    lines = [f"  {summary['lines']} lines, {summary['characters']} characters, "
+             f"length mean {summary['mean_length']:.1f} / median {summary['median_length']}"]
+    lengths = Counter(summary["lengths"])
+    lines.append("  most common lengths: " + ", ".join(f"{length} ({count})"
+                                                       for length, count in lengths.most_common(TOP)))
+    characters = list(summary["character_histogram"].items())[:TOP * 2]
+    lines.append("  most common characters: " + " ".join(f"{char!r}:{count}" for char, count in characters))
+    share = summary["mashed_lines"] / summary["lines"] if summary["lines"] else 0.0
+    lines.append(f"  mash score mean {summary['mean_mash']:.2f}, "
+                 f"{summary['mashed_lines']} lines ({share:.0%}) at or above {MASH_THRESHOLD}")
+    lines.append("  mash histogram: " + " ".join(str(count) for count in summary["mash_histogram"]))
+    units = list(summary["repeated_units"].items())[:TOP]
+    lines.append(f"  {summary['lines_with_runs']} lines with repeated runs; most repeated: "
+                 + " ".join(f"{unit!r}:{count}" for unit, count in units))
+    return "\n".join(lines)
+
+
+def report(path, summary):
+    if "sessions" not in summary:
+        return f"{path}\n" + text_report(summary)
+    lines = [path,
+             f"  {summary['sessions']} sessions, {summary['completed']} completed, "
+             f"{summary['answers_per_session']:.1f} answers per session, "
+             f"duration mean {summary['mean_duration']:.0f} s / median {summary['median_duration']} s"]
+    if summary["unreadable"]:
+        lines.append(f"  {summary['unreadable']} unreadable records skipped")
+    if summary["untimed"]:
+        lines.append(f"  {summary['untimed']} records without start / end times, left out of the durations")
+    if summary["bad_answers"]:
+        lines.append(f"  {summary['bad_answers']} malformed answers skipped")
+    return "\n".join(lines) + "\n" + text_report(summary["text"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistics over collected_input.txt and sessions.jsonl")
+    parser.add_argument("files", nargs="*", default=["collected_input.txt"],
+                        help="text logs (one input per line) and .jsonl session logs")
+    parser.add_argument("--layout", type=layout_string,
+                        help="keyboard layout of text logs: 'alphabetical' or the 26 letters typed by keys a-z")
+    parser.add_argument("--lines", action="store_true", help="print every line with its score instead of totals")
+    parser.add_argument("--workers", type=int, default=1, help="processes scanning chunks in parallel")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_MB, help="chunk size per worker task")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for path in args.files:
+        if args.lines:
+            print_lines(path, args.layout)
+            continue
+        results[path] = scan_file(path, args.layout, args.workers, args.chunk_mb << 20).summary()
+    if args.lines:
+        return
+    if args.json:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print("\n\n".join(report(path, summary) for path, summary in results.items()))
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,315 @@
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from mash import layout_inverse
+from session_log import record_answers
+
+# ================= ANSWER INDEX =================
+# The thank you screen can echo what an earlier visitor answered to one of the
+# same questions, picking the past answer that resembles the current one most.
+# Scanning the whole log for that does not scale, so past answers live in an
+# on-disk inverted index (SQLite) of character trigrams:
+#
+#   questions - one row per question text; answers are keyed by its id
+#   answers   - the answer as shown, and the keys that were pressed
+#   postings  - (question, trigram, answer), clustered by question and trigram
+#   grams     - how many answers of a question contain each trigram
+#
+# Trigrams are taken from the pressed keys (the answer de-scrambled with the
+# session's layout), so answers typed under different layouts still match.
+#
+# A lookup takes the CANDIDATE_GRAMS rarest trigrams of the query, reads at
+# most POSTINGS_PER_GRAM recent answers per trigram, and ranks the candidates by
+# Dice similarity of their trigram sets. The work per lookup is bounded no
+# matter how many answers are indexed, so it stays in milliseconds at millions.
+#
+# AnswerIndexWorker owns the connection on a background thread: the kiosk
+# queues lookups and new answers and never waits on the disk in a frame.
+#
+#   python answer_index.py build sessions.jsonl [--index answers.sqlite]
+#   python answer_index.py query "question text" "answer" [-k 5]
+
+GRAM = 3
+CANDIDATE_GRAMS = 8  # rarest trigrams of a query used to find candidates
+POSTINGS_PER_GRAM = 500  # most recent answers read per trigram
+BATCH = 1000  # answers per transaction when building from a log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (id INTEGER PRIMARY KEY, text TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS answers (id INTEGER PRIMARY KEY, question INTEGER NOT NULL,
+                                    text TEXT NOT NULL, keys TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (question INTEGER, gram TEXT, answer INTEGER,
+                                     PRIMARY KEY (question, gram, answer)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS grams (question INTEGER, gram TEXT, df INTEGER NOT NULL,
+                                  PRIMARY KEY (question, gram)) WITHOUT ROWID;
+"""
+
+
+def trigrams(text):
+    """
+    The set of character trigrams of text, lower-cased, with whitespace collapsed
+    and a space added at both ends.
+    """
+    text = " " + " ".join(text.lower().split()) + " "
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def similarity(a, b):
+    """
+    Dice coefficient of two trigram sets, 0..1.
+    """
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+class AnswerIndex:
+    """
+    The trigram index over one SQLite file. Not thread-safe: use it from one thread.
+    """
+
+    def __init__(self, path="answers.sqlite"):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._questions = dict(self.db.execute("SELECT text, id FROM questions"))
+
+    def _question_id(self, question, create=False):
+        question_id = self._questions.get(question)
+        if question_id is None:
+            # Other processes (stations) may have added the question since it was last looked up
+            if create:
+                self.db.execute("INSERT OR IGNORE INTO questions (text) VALUES (?)", (question,))
+            row = self.db.execute("SELECT id FROM questions WHERE text = ?", (question,)).fetchone()
+            if row is not None:
+                question_id = self._questions[question] = row[0]
+        return question_id
+
+    def add(self, entries):
+        """
+        Indexes (question, text, keys) entries in one transaction; keys are the
+        pressed keys, text the answer as shown. Blank answers are skipped.
+        Returns the number of answers indexed.
+        """
+        added = 0
+        with self.db:
+            for question, text, keys in entries:
+                grams = trigrams(keys)
+                if not text.strip() or not grams:
+                    continue
+                question_id = self._question_id(question, create=True)
+                answer_id = self.db.execute("INSERT INTO answers (question, text, keys) VALUES (?, ?, ?)",
+                                            (question_id, text, keys)).lastrowid
+                self.db.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                                    [(question_id, gram, answer_id) for gram in grams])
+                self.db.executemany("INSERT INTO grams VALUES (?, ?, 1) "
+                                    "ON CONFLICT (question, gram) DO UPDATE SET df = df + 1",
+                                    [(question_id, gram) for gram in grams])
+                added += 1
+        return added
+
+    def lookup(self, question, keys, k=1):
+        """
+        Returns up to k (similarity, text) pairs of past answers to question
+        that resemble keys, best first.
+        """
+        question_id = self._question_id(question)
+        grams = trigrams(keys)
+        if question_id is None or not grams:
+            return []
+        placeholders = ",".join("?" * len(grams))
+        frequencies = self.db.execute(f"SELECT gram, df FROM grams WHERE question = ? AND gram IN ({placeholders})",
+                                      (question_id, *grams)).fetchall()
+        rarest = [gram for gram, _ in sorted(frequencies, key=lambda row: row[1])[:CANDIDATE_GRAMS]]
+
+        shared = Counter()
+        for gram in rarest:
+            shared.update(answer for answer, in self.db.execute(
+                "SELECT answer FROM postings WHERE question = ? AND gram = ? ORDER BY answer DESC LIMIT ?",
+                (question_id, gram, POSTINGS_PER_GRAM)))
+        if not shared:
+            return []
+        candidates = [answer for answer, _ in shared.most_common(POSTINGS_PER_GRAM)]
+        rows = self.db.execute(f"SELECT text, keys FROM answers WHERE id IN ({','.join('?' * len(candidates))})",
+                               candidates)
+        scored = sorted(((similarity(grams, trigrams(other_keys)), text) for text, other_keys in rows),
+                        key=lambda match: match[0], reverse=True)
+        return scored[:k]
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+class Lookup:
+    """
+    The result of a queued lookup: matches is set once done is.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.matches = []
+
+    def best(self, min_similarity=0.0):
+        """
+        The best (similarity, question, text) match, or None (also while not done).
+        """
+        if not self.done.is_set() or not self.matches:
+            return None
+        match = self.matches[0]
+        return match if match[0] >= min_similarity else None
+
+
+class AnswerIndexWorker:
+    """
+    Runs an AnswerIndex on a background thread. Lookups and additions are
+    queued and handled in order, so a lookup queued before the session's own
+    answers are added never finds them.
+    """
+
+    def __init__(self, path="answers.sqlite"):
+        self.path = path
+        self._requests = queue.Queue()
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+        self.slowest = 0.0
+        self.added = 0
+        self._thread = threading.Thread(target=self._run, name="answer index", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def lookup(self, entries, k=1):
+        """
+        Queues a lookup for every (question, keys) entry. Returns a Lookup whose
+        matches are (similarity, question, text), best first over all entries.
+        """
+        result = Lookup()
+        self._requests.put(("lookup", (list(entries), k, result)))
+        return result
+
+    def add(self, entries):
+        """
+        Queues (question, text, keys) entries for indexing.
+        """
+        self._requests.put(("add", list(entries)))
+
+    @property
+    def pending(self):
+        return self._requests.qsize()
+
+    def close(self, timeout=5.0):
+        """
+        Finishes the queued work and stops the thread.
+        """
+        self._requests.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        index = AnswerIndex(self.path)
+        try:
+            while True:
+                request = self._requests.get()
+                if request is None:
+                    break
+                kind, payload = request
+                try:
+                    if kind=="add":
+                        self.added += index.add(payload)
+                    else:
+                        self._lookup(index, *payload)
+                except sqlite3.Error as e:
+                    print(f"Answer index {kind} failed: {e}")
+                    if kind=="lookup":
+                        payload[2].done.set()
+        finally:
+            index.close()
+
+    def _lookup(self, index, entries, k, result):
+        start = time.perf_counter()
+        matches = []
+        for question, keys in entries:
+            matches.extend((score, question, text) for score, text in index.lookup(question, keys, k))
+        matches.sort(key=lambda match: match[0], reverse=True)
+        result.matches = matches[:k]
+        result.done.set()
+        seconds = time.perf_counter() - start
+        self.lookups += 1
+        self.lookup_seconds += seconds
+        self.slowest = max(self.slowest, seconds)
+
+    def report(self):
+        mean = self.lookup_seconds / self.lookups * 1000 if self.lookups else 0.0
+        return (f"Answer index: {self.added} answers added, {self.lookups} lookups, "
+                f"mean {mean:.1f} ms, slowest {self.slowest * 1000:.1f} ms")
+
+
+def session_answers(record):
+    """
+    Yields (question, text, keys) for the answers of a sessions.jsonl record;
+    malformed answers are skipped.
+    """
+    layout = record.get("layout")
+    inverse = layout_inverse(layout) if isinstance(layout, (str, dict)) and layout else None
+    for question, text, remapped in record_answers(record)[0]:
+        yield question, text, text.translate(inverse) if remapped and inverse else text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trigram index of past answers")
+    parser.add_argument("--index", default="answers.sqlite")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index every answer of a session log")
+    build.add_argument("sessions", nargs="?", default="sessions.jsonl")
+    query = commands.add_parser("query", help="find past answers resembling one")
+    query.add_argument("question")
+    query.add_argument("answer", help="the answer as typed (pressed keys)")
+    query.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    index = AnswerIndex(args.index)
+    if args.command=="build":
+        start = time.perf_counter()
+        batch = []
+        count = 0
+        unreadable = 0
+        with open(args.sessions, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict):
+                    unreadable += 1
+                    continue
+                batch.extend(session_answers(record))
+                if len(batch) >= BATCH:
+                    count += index.add(batch)
+                    batch = []
+        count += index.add(batch)
+        print(f"Indexed {count} answers in {time.perf_counter() - start:.1f} s, "
+              f"{len(index)} in {args.index}"
+              + (f", {unreadable} unreadable records skipped" if unreadable else ""))
+    else:
+        start = time.perf_counter()
+        matches = index.lookup(args.question, args.answer, args.k)
+        print(f"{len(matches)} matches in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for score, text in matches:
+            print(f"  {score:.2f}  {text}")
+    index.close()
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+# Runs without a window; set SDL_VIDEODRIVER yourself to benchmark on a real display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from effects import EFFECTS, HAVE_NUMPY, Glitcher, tail_rect
+
+# ================= GLITCH EFFECT BENCHMARK =================
+# Measures the cost of each glitch effect on a 4K screen, on the dirty region
+# the kiosk actually touches (the last few typed characters) and, for
+# comparison, on the whole input line.
+#
+#   python bench_effects.py [width height]
+
+FONT_PATH = "bulletin.regular.ttf"
+FONT_SIZE = 100  # the kiosk's 50 pt question font, doubled for 4K
+SAMPLE_TEXT = "fjckyfephyoephyoephyoephlsbskiymqvyvhgkya3bkc"
+GLITCH_CHARS = 4
+ITERATIONS = 500
+
+
+def time_effect(glitcher, screen, rect, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        glitcher.apply(screen, rect)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    if not HAVE_NUMPY:
+        print("NumPy is not installed; glitch effects are unavailable.")
+        sys.exit(1)
+
+    width, height = (int(v) for v in sys.argv[1:3]) if len(sys.argv) >= 3 else (3840, 2160)
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    font = pygame.font.Font(FONT_PATH, FONT_SIZE)
+
+    text_surface = font.render(SAMPLE_TEXT, True, (255, 255, 255))
+    text_rect = text_surface.get_rect(center=(width // 2, height // 2 + 100))
+    screen.fill((0, 0, 0))
+    screen.blit(text_surface, text_rect)
+
+    regions = [
+        (f"last {GLITCH_CHARS} chars", tail_rect(font, SAMPLE_TEXT, text_rect, GLITCH_CHARS)),
+        ("whole line", text_rect.clip(screen.get_rect())),
+    ]
+
+    print(f"Screen {width}x{height}, {ITERATIONS} iterations per measurement")
+    for label, rect in regions:
+        print(f"\n{label}: {rect.width}x{rect.height} px")
+        for name in EFFECTS + ("all",):
+            effects = EFFECTS if name=="all" else (name,)
+            glitcher = Glitcher(effects, strength=8, seed=0)
+            cost = time_effect(glitcher, screen, rect, ITERATIONS)
+            print(f"  {name:<14} {cost:8.3f} ms/frame")
+
+    pygame.quit()
+
+
+if __name__=="__main__":
+    main()
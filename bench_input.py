@@ -0,0 +1,90 @@
+import os
+import random
+import string
+import sys
+import time
+
+# Runs without a window; set SDL_VIDEODRIVER yourself to benchmark on a real display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from input_pipeline import InputPipeline
+
+# ================= INPUT PIPELINE BENCHMARK =================
+# Simulates a visitor mashing the keyboard at a fixed rate: KEYDOWN + TEXTINPUT
+# pairs (with an Enter every few keys) are queued on schedule and drained frame
+# by frame through InputPipeline, at several frame rates. Every posted
+# character and Enter must come out the other end; the exit code is 1 otherwise.
+#
+#   python bench_input.py [keys_per_second] [seconds]
+
+FRAME_RATES = (60, 30, 5)  # typing, input and idle rates of the frame governor
+ENTER_EVERY = 12  # keys between Enter presses
+# Mostly letters, plus characters that only arrive through TEXTINPUT
+ALPHABET = string.ascii_letters + string.digits + "，。ü"
+
+
+def post_key(i, sent):
+    if (i + 1) % ENTER_EVERY==0:
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, mod=0, unicode="\r", scancode=0))
+        sent["enters"] += 1
+    else:
+        char = random.choice(ALPHABET)
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=ord(char.lower()) if char.isascii() else 0,
+                                             mod=0, unicode=char, scancode=0))
+        pygame.event.post(pygame.event.Event(pygame.TEXTINPUT, text=char))
+        sent["chars"] += 1
+
+
+def run(keys_per_second, seconds, fps):
+    pipeline = InputPipeline({letter: letter for letter in string.ascii_lowercase})
+    sent = {"chars": 0, "enters": 0}
+    received = {"chars": 0, "enters": 0}
+    total_keys = int(keys_per_second * seconds)
+
+    clock = pygame.time.Clock()
+    frames = 0
+    busy = 0.0
+    posted = 0
+    pygame.event.clear()
+    start_time = time.perf_counter()
+    while posted < total_keys or pygame.event.peek():
+        # Keys "arrive" on schedule while the previous frame was drawn and slept.
+        # (pygame.event.post is not safe to call from a second thread, so the
+        # arrivals are queued here, right before the frame drains the queue.)
+        due = min(total_keys, int((time.perf_counter() - start_time) * keys_per_second))
+        while posted < due:
+            post_key(posted, sent)
+            posted += 1
+
+        start = time.perf_counter()
+        batch = pipeline.drain(pygame.event.get())
+        for segment in batch.segments:
+            received["chars"] += len(pipeline.translate(segment))
+        received["enters"] += batch.enters
+        busy += time.perf_counter() - start
+        frames += 1
+        clock.tick(fps)
+
+    dropped = (sent["chars"] - received["chars"]) + (sent["enters"] - received["enters"])
+    print(f"  {fps:>3} fps: {sent['chars']} chars + {sent['enters']} enters posted, "
+          f"{received['chars']} + {received['enters']} received, {dropped} dropped, "
+          f"{busy / frames * 1e6:7.1f} us/frame in the pipeline")
+    return dropped
+
+
+def main():
+    keys_per_second = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pygame.init()
+    pygame.display.set_mode((320, 240))
+
+    print(f"{keys_per_second:g} keys/s for {seconds:g} s per frame rate")
+    dropped = sum(run(keys_per_second, seconds, fps) for fps in FRAME_RATES)
+    pygame.quit()
+    sys.exit(1 if dropped else 0)
+
+
+if __name__=="__main__":
+    main()
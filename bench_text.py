@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+# Runs without a window; set SDL_VIDEODRIVER yourself to benchmark on a real display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from font_fallback import fallback_paths
+from text_backend import TEXT_BACKENDS, make_text_backend
+
+# ================= TEXT BACKEND BENCHMARK =================
+# Measures drawing the line a visitor is typing, as the kiosk does every frame:
+# the text grows by one character per frame and is drawn centered on a 4K
+# screen. Each backend is timed separately, then once more for layout only
+# (get_rect), which must not rasterize anything. For the glyph atlas, the
+# number of glyphs it had to rasterize is printed as well.
+#
+#   python bench_text.py [backend ...]      (default: every backend)
+
+FONT_PATHS = ["bulletin.regular.ttf", "TypeLightSans-KV84p.otf"]
+FONT_SIZE = 100  # the kiosk's 50 pt answer font, doubled for 4K
+SCREEN_SIZE = (3840, 2160)
+SAMPLE_TEXT = "fjckyfephyoephyoephyoephlsbskiymqvyvhgkya3bkc"
+FRAMES = 2000
+
+
+def bench(name, paths, screen):
+    font = make_text_backend(name, paths, FONT_SIZE)
+    center = (screen.get_width() // 2, screen.get_height() // 2 + 100)
+    lines = [SAMPLE_TEXT[:i % len(SAMPLE_TEXT) + 1] for i in range(FRAMES)]
+
+    start = time.perf_counter()
+    for text in lines:
+        font.draw(screen, text, (255, 255, 255), center=center)
+    draw_ms = (time.perf_counter() - start) / FRAMES * 1000
+
+    start = time.perf_counter()
+    for text in lines:
+        font.get_rect(text, center=center)
+    layout_ms = (time.perf_counter() - start) / FRAMES * 1000
+
+    line = f"  {name:<10} draw {draw_ms:7.3f} ms/frame   layout {layout_ms:7.4f} ms/frame"
+    if hasattr(font, "stats"):
+        hits, misses, evictions = font.stats()
+        line += f"   atlas: {misses} glyphs rasterized, {hits} reused, {evictions} evicted"
+    print(line)
+
+
+def main():
+    names = sys.argv[1:] or list(TEXT_BACKENDS)
+    pygame.init()
+    screen = pygame.display.set_mode(SCREEN_SIZE)
+    paths = fallback_paths(FONT_PATHS)
+
+    print(f"Screen {SCREEN_SIZE[0]}x{SCREEN_SIZE[1]}, {FONT_SIZE} px, {FRAMES} frames per backend")
+    for name in names:
+        bench(name, paths, screen)
+    pygame.quit()
+
+
+if __name__=="__main__":
+    main()
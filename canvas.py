@@ -0,0 +1,111 @@
+import pygame
+
+# ================= LOGICAL CANVAS =================
+# The kiosk used to draw straight into a fullscreen display at whatever
+# resolution the machine reports, with layout offsets (-75, +50, +150, ...) that
+# only look right at 1080p. On a 4K display every fill and flip then moves four
+# times the pixels.
+#
+# A Canvas is a surface of a fixed logical size that the frame is drawn into and
+# that is scaled to the display once per frame:
+#
+#   hardware - pygame.SCALED: the display surface is the canvas and SDL's renderer
+#              scales it on flip (letterboxed, on the GPU where there is one)
+#   integer  - the canvas is scaled by the largest whole factor that fits and
+#              centered, so pixels stay sharp
+#   smooth   - the canvas is smooth-scaled to fit the display, keeping its aspect ratio
+#
+# Layout is written in design pixels for a DESIGN_HEIGHT tall screen and
+# converted with Canvas.px(), so a 720p canvas shows the same picture as a 1080p
+# one, only cheaper and softer.
+
+DESIGN_HEIGHT = 1080
+SCALING_MODES = ("hardware", "integer", "smooth")
+
+
+class Canvas:
+    """
+    Opens the display and provides the surface a frame is drawn into.
+
+    logical_size None renders at the display's own resolution (no scaling).
+    display picks the monitor on machines with several.
+    """
+
+    def __init__(self, logical_size=None, scaling="hardware", fullscreen=True, design_height=DESIGN_HEIGHT,
+                 display=0):
+        if scaling not in SCALING_MODES:
+            raise ValueError(f"unknown canvas scaling '{scaling}' (use one of {', '.join(SCALING_MODES)})")
+        desktops = pygame.display.get_desktop_sizes()
+        if not 0 <= display < len(desktops):
+            raise ValueError(f"display {display} does not exist ({len(desktops)} found)")
+        display_size = desktops[display]
+        flags = pygame.FULLSCREEN if fullscreen else 0
+
+        self.scaling = scaling if logical_size is not None and tuple(logical_size)!=display_size else None
+        self._scaled = None  # scaled copy of the canvas, allocated once
+        self._scaled_rect = None
+        if self.scaling is None:
+            self.display = pygame.display.set_mode(display_size, flags, display=display)
+            self.surface = self.display
+        elif self.scaling=="hardware":
+            self.display = pygame.display.set_mode(logical_size, flags | pygame.SCALED, display=display)
+            self.surface = self.display
+        else:
+            self.display = pygame.display.set_mode(display_size, flags, display=display)
+            self.surface = pygame.Surface(logical_size).convert()
+            self._scaled_rect = self._fit(self.surface.get_size(), self.display.get_size())
+            self._scaled = pygame.Surface(self._scaled_rect.size).convert()
+
+        self.width, self.height = self.surface.get_size()
+        self.size = (self.width, self.height)
+        self.center = (self.width // 2, self.height // 2)
+        self.scale = self.height / design_height
+
+    def _fit(self, canvas_size, display_size):
+        """
+        Returns the display rect the canvas is presented in.
+        """
+        canvas_w, canvas_h = canvas_size
+        display_w, display_h = display_size
+        if self.scaling=="integer":
+            factor = min(display_w // canvas_w, display_h // canvas_h)
+            if factor >= 1:
+                rect = pygame.Rect(0, 0, canvas_w * factor, canvas_h * factor)
+                rect.center = (display_w // 2, display_h // 2)
+                return rect
+            # The canvas is larger than the display: there is no whole factor, shrink smoothly
+            self.scaling = "smooth"
+        factor = min(display_w / canvas_w, display_h / canvas_h)
+        rect = pygame.Rect(0, 0, round(canvas_w * factor), round(canvas_h * factor))
+        rect.center = (display_w // 2, display_h // 2)
+        return rect
+
+    def px(self, value):
+        """
+        Converts a length in design pixels to canvas pixels.
+        """
+        return int(round(value * self.scale))
+
+    def at(self, dx=0, dy=0):
+        """
+        Returns the canvas point dx, dy design pixels away from the center.
+        """
+        return (self.width // 2 + self.px(dx), self.height // 2 + self.px(dy))
+
+    def present(self):
+        """
+        Shows the finished frame on the display.
+        """
+        if self._scaled is not None:
+            if self.scaling=="integer":
+                pygame.transform.scale(self.surface, self._scaled_rect.size, self._scaled)
+            else:
+                pygame.transform.smoothscale(self.surface, self._scaled_rect.size, self._scaled)
+            self.display.blit(self._scaled, self._scaled_rect)
+        pygame.display.flip()
+
+    def describe(self):
+        display_w, display_h = pygame.display.get_window_size()
+        if self.scaling is None:
+            return f"Canvas: {self.width}x{self.height} (native)"
+        return f"Canvas: {self.width}x{self.height} {self.scaling}-scaled to {display_w}x{display_h}"
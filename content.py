@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+
+from question_graph import compile_graph, linear_graph
+
+# ================= CONTENT FILE =================
+# The kiosk copy (waiting sentences, questions and timings) lives in a JSON file
+# next to the scripts so it can be edited while the installation is running.
+#
+# {
+#     "sentences": ["Type to me.", ...],
+#     "questions": ["Do you trust me?", ...],
+#     "timings": {"waiting_mode_sentence_interval": 2, ...}
+# }
+#
+# Instead of "questions" the file may hold a branching "question_graph" (see
+# question_graph.py). Missing keys fall back to the defaults passed in by the
+# kiosk script.
+
+TIMING_KEYS = (
+    "waiting_mode_sentence_interval",
+    "input_mode_timeout",
+    "question_mode_timeout",
+    "question_mode_reset",
+    "thank_you_duration",
+)
+
+
+class Content:
+    """
+    One immutable version of the content file. The kiosk only ever holds a
+    reference to a whole Content object, so swapping versions is atomic.
+    """
+
+    def __init__(self, sentences, questions, timings, raw=None, version=0, graph=None):
+        self.sentences = tuple(sentences)
+        self.graph = graph if graph is not None else linear_graph(questions)
+        self.questions = self.graph.texts()
+        self.timings = dict(timings)
+        self.raw = raw if raw is not None else {}
+        self.version = version
+
+    def __getattr__(self, name):
+        # Timings are read as attributes, e.g. content.thank_you_duration
+        timings = self.__dict__.get("timings", {})
+        if name in timings:
+            return timings[name]
+        raise AttributeError(name)
+
+    def strings(self):
+        """
+        Returns every string of this version that is drawn on screen.
+        """
+        return set(self.sentences) | set(self.questions)
+
+
+def load_content(path, defaults, version=0):
+    """
+    Reads the content file at path. Values missing from the file are taken from
+    the defaults Content. Raises ValueError if the file is not valid.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: {e}")
+
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: top level must be an object")
+
+    sentences = data.get("sentences", defaults.sentences)
+    questions = data.get("questions", defaults.questions)
+    graph = None
+    if "question_graph" in data:
+        # Compiled here, on the watcher thread, so the kiosk only ever sees the finished table
+        try:
+            graph = compile_graph(data["question_graph"])
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: {e}")
+        questions = graph.texts()
+    elif "questions" not in data:
+        graph = defaults.graph
+
+    for name, values in (("sentences", sentences), ("questions", questions)):
+        if not isinstance(values, (list, tuple)) or not values or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"{path}: '{name}' must be a non-empty list of strings")
+
+    if not isinstance(data.get("timings", {}), dict):
+        raise ValueError(f"{path}: 'timings' must be an object")
+    timings = dict(defaults.timings)
+    for key, value in data.get("timings", {}).items():
+        if key not in TIMING_KEYS:
+            raise ValueError(f"{path}: unknown timing '{key}'")
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"{path}: timing '{key}' must be a positive number")
+        timings[key] = value
+
+    return Content(sentences, questions, timings, raw=data, version=version, graph=graph)
+
+
+class ContentWatcher:
+    """
+    Polls the content file's mtime on a daemon thread. A changed file is parsed
+    on that thread and parked as the pending version; the main loop picks it up
+    with take_pending() when no session is running.
+    """
+
+    def __init__(self, path, defaults, poll_interval=1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.defaults = defaults
+        self.current = defaults
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._version = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+        # Load synchronously once so the first frame already uses the file
+        self._check()
+        self.take_pending()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _check(self):
+        stamp = self._stat()
+        if stamp is None or stamp==self._stamp:
+            return
+        self._stamp = stamp
+        try:
+            content = load_content(self.path, self.defaults, self._version + 1)
+        except Exception as e:
+            # Keep the current version; a half-saved file will be retried on the next change.
+            # Anything unexpected is caught as well: it must not end the watcher thread
+            print(f"Could not load content from {self.path}: {e}")
+            return
+        self._version = content.version
+        with self._lock:
+            self._pending = content
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self._check()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def request_reload(self):
+        """
+        Forces the next poll to re-read the file even if its mtime is unchanged.
+        """
+        self._stamp = None
+
+    def take_pending(self):
+        """
+        Returns the newest loaded version not yet handed out (or None) and makes
+        it the current one.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self.current = pending
+        return pending
+
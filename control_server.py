@@ -0,0 +1,180 @@
+import json
+import queue
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# ================= CONTROL SERVER =================
+# An optional HTTP endpoint on localhost for monitoring and remote control,
+# stdlib only (http.server), serving from its own daemon thread:
+#
+#   GET  /metrics                 Prometheus text format
+#   GET  /health                  {"mode": ..., "updated": ...} as JSON
+#   POST /control/reload-content  re-read the content file (applied between sessions)
+#   POST /control/rotate-layout   new random keyboard layout (applied between sessions)
+#   POST /control/waiting         end the session or thank you screen, back to Waiting Mode
+#
+# The server thread never touches the kiosk's objects (pygame or otherwise):
+#
+#   metrics  - the main loop counts into KioskMetrics and publishes a snapshot
+#              of its gauges every PUBLISH_INTERVAL seconds; the server formats
+#              the last published snapshot
+#   commands - a POST only puts the command's name in a queue; the main loop
+#              takes them with ControlServer.commands() once per frame
+#
+#   curl -s localhost:8765/metrics
+#   curl -s -X POST localhost:8765/control/waiting
+
+HOST = "127.0.0.1"
+PUBLISH_INTERVAL = 1.0
+COMMANDS = ("reload-content", "rotate-layout", "waiting")
+# Upper bounds of the frame time histogram buckets, in milliseconds. Frame time is
+# the frame's work, measured before the frame governor waits for the frame rate
+FRAME_BUCKETS_MS = (5, 10, 17, 25, 34, 50, 100, 250, 1000)
+
+
+class KioskMetrics:
+    """
+    Main loop side: frame time histograms per mode, counters, and the last
+    published snapshot that the server thread reads.
+    """
+
+    def __init__(self, buckets_ms=FRAME_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        # Per mode: [count per bucket (+Inf last), sum of milliseconds]
+        self._frames = {}
+        self.counters = {}
+        self.started = time.time()
+        self.snapshot = None  # replaced as a whole by publish(), never changed in place
+
+    def frame(self, mode, frame_ms):
+        histogram = self._frames.get(mode)
+        if histogram is None:
+            histogram = self._frames[mode] = [[0] * (len(self.buckets_ms) + 1), 0.0]
+        histogram[0][bisect_left(self.buckets_ms, frame_ms)] += 1
+        histogram[1] += frame_ms
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def publish(self, mode, gauges):
+        """
+        Makes the current histograms, counters and gauges the snapshot the
+        server reports. gauges: {name: value} or {name: [(labels dict, value), ...]}.
+        """
+        frames = {name: (list(counts), total) for name, (counts, total) in self._frames.items()}
+        self.snapshot = (time.time(), mode, frames, dict(self.counters), dict(gauges))
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+def format_metrics(metrics):
+    """
+    The last published snapshot of metrics in Prometheus text format.
+    """
+    snapshot = metrics.snapshot
+    if snapshot is None:
+        return ""
+    updated, mode, frames, counters, gauges = snapshot
+    lines = ["# TYPE kiosk_mode gauge", f'kiosk_mode{{mode="{mode}"}} 1',
+             "# HELP kiosk_frame_seconds Frame work time (without the frame rate wait), per mode",
+             "# TYPE kiosk_frame_seconds histogram"]
+    for frame_mode, (counts, total) in sorted(frames.items()):
+        cumulative = 0
+        for bound, count in zip(metrics.buckets_ms + (None,), counts):
+            cumulative += count
+            le = "+Inf" if bound is None else f"{bound / 1000:g}"
+            lines.append(f'kiosk_frame_seconds_bucket{{mode="{frame_mode}",le="{le}"}} {cumulative}')
+        lines.append(f'kiosk_frame_seconds_sum{{mode="{frame_mode}"}} {total / 1000:.6f}')
+        lines.append(f'kiosk_frame_seconds_count{{mode="{frame_mode}"}} {cumulative}')
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE kiosk_{name}_total counter")
+        for (counter, labels), value in sorted(counters.items()):
+            if counter==name:
+                lines.append(f"kiosk_{name}_total{_labels(labels)} {value}")
+
+    gauges = dict(gauges, uptime_seconds=updated - metrics.started, snapshot_timestamp_seconds=updated)
+    for name, value in gauges.items():
+        lines.append(f"# TYPE kiosk_{name} gauge")
+        samples = value if isinstance(value, list) else [({}, value)]
+        for labels, sample in samples:
+            lines.append(f"kiosk_{name}{_labels(sorted(labels.items()))} {sample}")
+    return "\n".join(lines) + "\n"
+
+
+class ControlServer:
+    """
+    The HTTP server and its thread. Bound to localhost only.
+    """
+
+    def __init__(self, metrics, port, host=HOST):
+        self.metrics = metrics
+        self._commands = queue.Queue()
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if self.path=="/metrics":
+                    self._reply(200, format_metrics(server.metrics), "text/plain; version=0.0.4")
+                elif self.path=="/health":
+                    snapshot = server.metrics.snapshot
+                    health = {"updated": snapshot[0] if snapshot else None,
+                              "mode": snapshot[1] if snapshot else None}
+                    self._reply(200, json.dumps(health), "application/json")
+                else:
+                    self._reply(404, "not found\n")
+
+            def do_POST(self):
+                server.requests += 1
+                command = self.path[len("/control/"):] if self.path.startswith("/control/") else None
+                if command not in COMMANDS:
+                    self._reply(404, f"commands: {', '.join(COMMANDS)}\n")
+                    return
+                server._commands.put(command)
+                self._reply(202, json.dumps({"queued": command}), "application/json")
+
+            def _reply(self, status, body, content_type="text/plain"):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # one line per scrape would drown the kiosk's own output
+
+        self._server = HTTPServer((host, port), Handler)
+        self.address = self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control server", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def commands(self):
+        """
+        Returns the commands received since the last call. Never blocks.
+        """
+        commands = []
+        while True:
+            try:
+                commands.append(self._commands.get_nowait())
+            except queue.Empty:
+                return commands
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def report(self):
+        return f"Control server: {self.requests} requests on {self.address[0]}:{self.address[1]}"
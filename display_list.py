@@ -0,0 +1,39 @@
+# ================= DISPLAY LISTS =================
+# A scene made of several lines used to call screen.blit once per line on every
+# frame, and some scenes rebuilt their line lists every frame too. A DisplayList
+# holds the (surface, position) pairs of a scene; it is rebuilt only when the
+# scene's content key changes and drawn with a single Surface.blits call.
+
+
+class DisplayList:
+    """
+    (surface, position) pairs of one scene, tagged with the content key they
+    were built from.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.key = None
+        self.builds = 0
+
+    def is_current(self, key):
+        return self.key is not None and self.key==key
+
+    def rebuild(self, key, items):
+        self.key = key
+        self.items = list(items)
+        self.builds += 1
+
+    def invalidate(self):
+        self.key = None
+
+    def draw(self, target):
+        if self.items:
+            target.blits(self.items, doreturn=False)
+
+
+def centered(surface, center):
+    """
+    Returns the (surface, rect) pair that draws surface centered on center.
+    """
+    return surface, surface.get_rect(center=center)
@@ -0,0 +1,98 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # effects are optional; the kiosk runs without NumPy
+    np = None
+
+# ================= GLITCH EFFECTS =================
+# The installation is about a machine mis-hearing the visitor, so freshly typed
+# characters glitch for a moment. All effects are NumPy array operations on a
+# pygame.surfarray view of only the dirty region, i.e. the last few characters
+# of the input line; there are no per-pixel Python loops.
+#
+#   jitter         - the region is nudged by a random offset
+#   channel_shift  - red and blue are pulled apart horizontally
+#   scanline_tear  - bands of rows slide sideways
+#
+# The effects work on the screen after the input line has been drawn, so they
+# see the glyphs composited on the opaque background. A text surface itself is
+# plain text color with per-pixel alpha, where shifting color channels would
+# not show.
+
+EFFECTS = ("jitter", "channel_shift", "scanline_tear")
+
+HAVE_NUMPY = np is not None
+
+
+def jitter(region, rng, strength):
+    dx, dy = rng.integers(-strength, strength + 1, 2)
+    region[:] = np.roll(region, (int(dx), int(dy)), axis=(0, 1))
+
+
+def channel_shift(region, rng, strength):
+    shift = int(rng.integers(1, strength + 1))
+    region[..., 0] = np.roll(region[..., 0], shift, axis=0)
+    region[..., 2] = np.roll(region[..., 2], -shift, axis=0)
+
+
+def scanline_tear(region, rng, strength):
+    width, height = region.shape[:2]
+    # A few bands of rows, each shifted sideways by its own offset; only those rows are touched
+    bands = max(1, height // 40)
+    band_height = max(1, height // 10)
+    starts = rng.integers(0, height, bands)
+    offsets = rng.integers(-strength * 3, strength * 3 + 1, bands)
+    rows = (starts[:, None] + np.arange(band_height)[None, :]).clip(0, height - 1).ravel()
+    shifts = np.repeat(offsets, band_height)
+    columns = (np.arange(width)[:, None] - shifts[None, :]) % width
+    region[:, rows] = region[columns, rows[None, :]]
+
+
+EFFECT_FUNCTIONS = {
+    "jitter": jitter,
+    "channel_shift": channel_shift,
+    "scanline_tear": scanline_tear,
+}
+
+
+class Glitcher:
+    """
+    Applies a chain of glitch effects to a rectangle of a surface.
+    """
+
+    def __init__(self, effects=EFFECTS, strength=4, seed=None):
+        if not HAVE_NUMPY:
+            raise RuntimeError("glitch effects need NumPy")
+        for name in effects:
+            if name not in EFFECT_FUNCTIONS:
+                raise ValueError(f"unknown glitch effect '{name}'")
+        self.effects = [EFFECT_FUNCTIONS[name] for name in effects]
+        self.strength = strength
+        self.rng = np.random.default_rng(seed)
+
+    def apply(self, surface, rect, intensity=1.0):
+        """
+        Glitches rect of surface in place. intensity (0..1) scales the strength.
+        """
+        rect = pygame.Rect(rect).clip(surface.get_rect())
+        strength = int(round(self.strength * intensity))
+        if strength < 1 or rect.width < 2 or rect.height < 2:
+            return
+        pixels = pygame.surfarray.pixels3d(surface)
+        region = pixels[rect.left:rect.right, rect.top:rect.bottom]
+        for effect in self.effects:
+            effect(region, self.rng, strength)
+        del region, pixels  # unlock the surface
+
+
+def tail_rect(font, text, text_rect, chars):
+    """
+    Returns the screen rect covered by the last chars characters of text drawn
+    at text_rect, measured with font metrics only.
+    """
+    if not text or chars <= 0:
+        return pygame.Rect(text_rect.right, text_rect.top, 0, 0)
+    head_width = font.size(text[:-chars])[0] if len(text) > chars else 0
+    return pygame.Rect(text_rect.left + head_width, text_rect.top,
+                       text_rect.width - head_width, text_rect.height)
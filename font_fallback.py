@@ -0,0 +1,270 @@
+import os
+import struct
+
+import pygame
+
+# ================= FONT FALLBACK CHAIN =================
+# bulletin.regular.ttf has no glyphs for many characters visitors type (CJK
+# punctuation, symbols, ...), which then render as boxes. A FontChain renders
+# each character with the first font of a list that actually has a glyph for it.
+#
+# Glyph coverage is read once per font file from its cmap table into a set of
+# codepoints, so choosing a font for a character is a set lookup; nothing is
+# ever rendered to find out whether a glyph exists. (pygame.font's metrics()
+# cannot be used for this: it reports the .notdef box as a real glyph.)
+
+# System fonts tried after the kiosk's own fonts, by pygame.font.match_font name
+SYSTEM_FALLBACK_FONTS = (
+    "notosanscjksc",
+    "notosanscjk",
+    "notosans",
+    "droidsansfallback",
+    "dejavusans",
+    "arialunicodems",
+    "freesans",
+)
+
+# Per-character memos (font choice, advances, kerning pairs) are cleared when they
+# reach this many entries, so visitors typing ever new codepoints cannot grow them forever
+MEMO_LIMIT = 4096
+
+# The font pygame.font.SysFont(None, size) draws with, and the share of size it draws it at
+DEFAULT_FONT_PATH = os.path.join(os.path.dirname(pygame.__file__), pygame.font.get_default_font())
+DEFAULT_FONT_SCALE = 0.6875
+
+_coverage_cache = {}
+
+
+def _cmap_format_4(data, offset):
+    seg_count = struct.unpack_from(">H", data, offset + 6)[0] // 2
+    end_offset = offset + 14
+    start_offset = end_offset + seg_count * 2 + 2
+    delta_offset = start_offset + seg_count * 2
+    range_offset = delta_offset + seg_count * 2
+    ends = struct.unpack_from(f">{seg_count}H", data, end_offset)
+    starts = struct.unpack_from(f">{seg_count}H", data, start_offset)
+    deltas = struct.unpack_from(f">{seg_count}H", data, delta_offset)
+    range_offsets = struct.unpack_from(f">{seg_count}H", data, range_offset)
+
+    codepoints = set()
+    for i in range(seg_count):
+        start, end, delta, id_range = starts[i], ends[i], deltas[i], range_offsets[i]
+        if start==0xFFFF:
+            continue
+        if id_range==0:
+            codepoints.update(c for c in range(start, end + 1) if (c + delta) & 0xFFFF)
+            continue
+        for c in range(start, end + 1):
+            # idRangeOffset is relative to its own position in the table
+            glyph_offset = range_offset + i * 2 + id_range + (c - start) * 2
+            if glyph_offset + 2 <= len(data) and struct.unpack_from(">H", data, glyph_offset)[0]:
+                codepoints.add(c)
+    return codepoints
+
+
+def _cmap_format_12(data, offset):
+    groups = struct.unpack_from(">I", data, offset + 12)[0]
+    codepoints = set()
+    for i in range(groups):
+        start, end, glyph = struct.unpack_from(">III", data, offset + 16 + i * 12)
+        codepoints.update(range(start + (glyph==0), end + 1))
+    return codepoints
+
+
+def read_cmap_coverage(path):
+    """
+    Returns the set of codepoints that have a glyph in the font file at path
+    (TrueType, OpenType or the first font of a collection).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    font_offset = 0
+    if data[:4]==b"ttcf":
+        font_offset = struct.unpack_from(">I", data, 12)[0]
+    num_tables = struct.unpack_from(">H", data, font_offset + 4)[0]
+    cmap_offset = None
+    for i in range(num_tables):
+        tag, _, table_offset, _ = struct.unpack_from(">4sIII", data, font_offset + 12 + i * 16)
+        if tag==b"cmap":
+            cmap_offset = table_offset
+    if cmap_offset is None:
+        raise ValueError(f"{path} has no cmap table")
+
+    subtables = {}
+    for i in range(struct.unpack_from(">H", data, cmap_offset + 2)[0]):
+        platform, encoding, sub_offset = struct.unpack_from(">HHI", data, cmap_offset + 4 + i * 8)
+        sub_format = struct.unpack_from(">H", data, cmap_offset + sub_offset)[0]
+        subtables[(platform, encoding, sub_format)] = cmap_offset + sub_offset
+
+    # Full Unicode tables first, then the BMP ones
+    for key in ((3, 10, 12), (0, 4, 12), (0, 6, 12), (3, 1, 4), (0, 3, 4), (0, 1, 4), (0, 0, 4)):
+        if key in subtables:
+            parse = _cmap_format_12 if key[2]==12 else _cmap_format_4
+            return parse(data, subtables[key])
+    raise ValueError(f"{path} has no Unicode cmap subtable")
+
+
+def glyph_coverage(path):
+    """
+    Cached read_cmap_coverage: every font file is parsed once per process.
+    """
+    coverage = _coverage_cache.get(path)
+    if coverage is None:
+        coverage = _coverage_cache[path] = frozenset(read_cmap_coverage(path))
+    return coverage
+
+
+def fallback_paths(font_paths, system_fonts=SYSTEM_FALLBACK_FONTS):
+    """
+    Returns font_paths followed by every system fallback font that is installed
+    and, last, the font that ships with pygame.
+    """
+    paths = list(font_paths)
+    for name in system_fonts:
+        try:
+            path = pygame.font.match_font(name)
+        except Exception:  # no fc-list or font registry on this machine
+            path = None
+        if path and path not in paths:
+            paths.append(path)
+    if os.path.exists(DEFAULT_FONT_PATH) and DEFAULT_FONT_PATH not in paths:
+        paths.append(DEFAULT_FONT_PATH)
+    return paths
+
+
+class FontChain:
+    """
+    A list of fonts of one size, rendered as one: each character is drawn with
+    the first font whose coverage contains it. Exposes render() and size()
+    like pygame.font.Font, so it can stand in for one.
+
+    draw() and get_rect() are the text backend interface shared with the other
+    backends in text_backend.py; this one rasterizes a Surface and blits it.
+    """
+
+    name = "font"
+
+    def __init__(self, paths, size, pool=None):
+        self.pool = pool  # SurfacePool that counts the surfaces rendering allocates
+        self.fonts = []
+        self.coverage = []
+        for path in paths:
+            try:
+                coverage = glyph_coverage(path)
+                font = self.open_font(path, size)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Skipping fallback font {path}: {e}")
+                continue
+            self.fonts.append(font)
+            self.coverage.append(coverage)
+        if not self.fonts:
+            raise ValueError("none of the fonts in the fallback chain could be loaded")
+        self.primary = self.fonts[0]
+        self._choice = {}
+        self.ascent, self.height = self.line_metrics()
+
+    def open_font(self, path, size):
+        return pygame.font.Font(path, size)
+
+    def line_metrics(self):
+        """
+        Returns (ascent, height) of a line that can hold glyphs of every font.
+        """
+        ascent = max(font.get_ascent() for font in self.fonts)
+        return ascent, ascent + max(-font.get_descent() for font in self.fonts)
+
+    def get_linesize(self):
+        """
+        Recommended distance between lines, like Font.get_linesize(): enough for every font.
+        """
+        return max(font.get_linesize() for font in self.fonts)
+
+    def font_index(self, char):
+        index = self._choice.get(char)
+        if index is None:
+            codepoint = ord(char)
+            index = 0  # nobody has it: let the primary font draw its box
+            for i, coverage in enumerate(self.coverage):
+                if codepoint in coverage:
+                    index = i
+                    break
+            if len(self._choice) >= MEMO_LIMIT:
+                self._choice.clear()
+            self._choice[char] = index
+        return index
+
+    def runs(self, text):
+        """
+        Splits text into (font index, substring) runs.
+        """
+        runs = []
+        start = 0
+        current = None
+        for i, char in enumerate(text):
+            index = self.font_index(char)
+            if index!=current:
+                if current is not None:
+                    runs.append((current, text[start:i]))
+                current, start = index, i
+        if current is not None:
+            runs.append((current, text[start:]))
+        return runs
+
+    def size(self, text):
+        runs = self.runs(text)
+        if len(runs) <= 1 and (not runs or runs[0][0]==0):
+            return self.primary.size(text)
+        return sum(self.fonts[index].size(part)[0] for index, part in runs), self.height
+
+    def render(self, text, antialias, color):
+        runs = self.runs(text)
+        if len(runs) <= 1 and (not runs or runs[0][0]==0):
+            self._track(1)
+            return self.primary.render(text, antialias, color)
+
+        # Mixed fonts: render each run and line them up on a shared baseline
+        parts = [(self.fonts[index], self.fonts[index].render(part, antialias, color)) for index, part in runs]
+        self._track(len(parts) + 1)
+        surface = pygame.Surface((sum(part.get_width() for _, part in parts), self.height), pygame.SRCALPHA)
+        x = 0
+        for font, part in parts:
+            surface.blit(part, (x, self.ascent - font.get_ascent()))
+            x += part.get_width()
+        return surface
+
+    def _track(self, count):
+        if self.pool is not None:
+            self.pool.track(count)
+
+    def get_rect(self, text, **position):
+        """
+        Returns the rect text would cover, placed like Surface.get_rect(**position),
+        measured without rasterizing.
+        """
+        rect = pygame.Rect((0, 0), self.size(text))
+        for attribute, value in position.items():
+            setattr(rect, attribute, value)
+        return rect
+
+    def draw(self, target, text, color, antialias=True, **position):
+        """
+        Draws text onto target placed like get_rect(**position) and returns its rect.
+        """
+        runs = self.runs(text)
+        if len(runs) <= 1 and (not runs or runs[0][0]==0):
+            surface = self.render(text, antialias, color)
+            rect = surface.get_rect(**position)
+            target.blit(surface, rect)
+            return rect
+
+        # Mixed fonts: every run goes straight onto the target, on the shared baseline
+        rect = self.get_rect(text, **position)
+        x = rect.left
+        for index, part in runs:
+            font = self.fonts[index]
+            surface = font.render(part, antialias, color)
+            target.blit(surface, (x, rect.top + self.ascent - font.get_ascent()))
+            x += surface.get_width()
+        self._track(len(runs))
+        return rect
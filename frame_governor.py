@@ -0,0 +1,99 @@
+import time
+
+import pygame
+
+# ================= FRAME RATE GOVERNOR =================
+# The kiosk used to run clock.tick(30) in every mode. The governor picks a frame
+# rate per frame from a small policy instead:
+#
+#   typing - a key arrived within the last typing_window seconds: high rate for low input latency
+#   input  - Input or Question Mode without recent keys
+#   fade   - a transition is animating
+#   idle   - Waiting or Thank You Mode with nothing moving
+#
+# In the idle state the governor sleeps in short slices and wakes up as soon as
+# an event is queued, so the first key press of a visitor is not held back by
+# the low idle rate.
+
+DEFAULT_POLICY = {
+    "typing": 60,
+    "input": 30,
+    "fade": 30,
+    "idle": 5,
+}
+
+WAKE_CHECK_MS = 10  # how often an idle frame checks the event queue
+
+
+class FrameGovernor:
+    """
+    Chooses the frame rate per frame and keeps track of time spent at each rate.
+    """
+
+    def __init__(self, policy=None, typing_window=0.5, idle_modes=(), wake_on_event=True):
+        self.policy = dict(DEFAULT_POLICY)
+        if policy:
+            unknown = set(policy) - set(DEFAULT_POLICY)
+            if unknown:
+                raise ValueError(f"unknown frame rate states: {', '.join(sorted(unknown))}")
+            self.policy.update(policy)
+        if min(self.policy.values()) <= 0:
+            raise ValueError("frame rates must be positive")
+        self.typing_window = typing_window
+        self.idle_modes = set(idle_modes)
+        self.wake_on_event = wake_on_event
+        self.last_key_time = None
+        self.state = "input"
+        self._frame_start = pygame.time.get_ticks()
+        self.seconds = {state: 0.0 for state in self.policy}
+        self.frames = {state: 0 for state in self.policy}
+
+    def key_pressed(self, now):
+        self.last_key_time = now
+
+    def choose(self, mode, fading, now):
+        """
+        Returns the policy state for this frame.
+        """
+        if self.last_key_time is not None and now - self.last_key_time < self.typing_window:
+            return "typing"
+        if fading:
+            return "fade"
+        if mode in self.idle_modes:
+            return "idle"
+        return "input"
+
+    def tick(self, clock, mode, fading=False, now=None):
+        """
+        Ends the frame: waits according to the chosen rate and returns the
+        frame time in milliseconds, like clock.tick().
+        """
+        self.state = self.choose(mode, fading, time.time() if now is None else now)
+        fps = self.policy[self.state]
+        if self.state=="idle" and self.wake_on_event:
+            # Sleep until the frame is due, but give up early when an event is waiting
+            frame_ms = 1000 // fps
+            remaining = frame_ms - (pygame.time.get_ticks() - self._frame_start)
+            while remaining > 0 and not pygame.event.peek():
+                pygame.time.wait(min(WAKE_CHECK_MS, remaining))
+                remaining = frame_ms - (pygame.time.get_ticks() - self._frame_start)
+            dt = clock.tick()
+        else:
+            dt = clock.tick(fps)
+        self._frame_start = pygame.time.get_ticks()
+        self.seconds[self.state] += dt / 1000
+        self.frames[self.state] += 1
+        return dt
+
+    def stats(self):
+        """
+        Returns {state: (fps, seconds, frames)} for every state of the policy.
+        """
+        return {state: (self.policy[state], self.seconds[state], self.frames[state]) for state in self.policy}
+
+    def report(self):
+        total = sum(self.seconds.values()) or 1
+        lines = ["Frame rate governor:"]
+        for state, (fps, seconds, frames) in self.stats().items():
+            lines.append(f"  {state:<7} {fps:>3} fps  {seconds:9.1f} s ({seconds / total:6.1%})  {frames} frames")
+        return "\n".join(lines)
@@ -0,0 +1,88 @@
+import gc
+import time
+
+# ================= GARBAGE COLLECTION POLICY =================
+# The kiosk runs for days, and Python's cyclic garbage collector can start a
+# collection in the middle of any frame, including while a visitor types. The
+# policy moves collections to moments where nobody is waiting on a frame:
+#
+#   - after start-up and warm-up, freeze() moves every object that exists by
+#     then (fonts, caches, content) into the permanent generation, so no later
+#     collection has to traverse them again
+#   - in busy modes (Input and Question Mode) automatic collection is off
+#   - in idle modes (Waiting and Thank You Mode) automatic collection is on, and
+#     a full collection runs on entering the mode and every collect_interval
+#     seconds while it lasts
+#
+# Every collection, automatic or not, is timed through gc.callbacks and
+# attributed to the mode it happened in, so report() shows whether any pause
+# landed while a visitor was typing.
+
+
+class GCPolicy:
+    """
+    Switches automatic garbage collection per mode and times every collection.
+    """
+
+    def __init__(self, busy_modes, idle_modes, collect_interval=30.0):
+        self.busy_modes = set(busy_modes)
+        self.idle_modes = set(idle_modes)
+        self.collect_interval = collect_interval
+        self.mode = "startup"
+        self.frozen = 0
+        self._last_collect = None
+        self._pause_start = None
+        # Per mode: [collections, total seconds, longest pause in seconds]
+        self.pauses = {}
+        gc.callbacks.append(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase=="start":
+            self._pause_start = time.perf_counter()
+        elif self._pause_start is not None:
+            pause = time.perf_counter() - self._pause_start
+            self._pause_start = None
+            stats = self.pauses.setdefault(self.mode, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += pause
+            stats[2] = max(stats[2], pause)
+
+    def freeze(self):
+        """
+        Collects once, then moves every surviving object to the permanent generation.
+        Call after start-up and cache warm-up.
+        """
+        gc.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+
+    def update(self, mode, now):
+        """
+        Applies the policy for the current frame's mode. Call once per frame.
+        """
+        if mode!=self.mode:
+            self.mode = mode
+            if mode in self.busy_modes:
+                gc.disable()
+            else:
+                gc.enable()
+                if mode in self.idle_modes:
+                    self.collect(now)
+        elif mode in self.idle_modes and now - self._last_collect >= self.collect_interval:
+            self.collect(now)
+
+    def collect(self, now):
+        gc.collect()
+        self._last_collect = now
+
+    def stop(self):
+        gc.callbacks.remove(self._on_gc)
+        gc.enable()
+
+    def report(self):
+        lines = [f"Garbage collection: {self.frozen} objects frozen at start-up"]
+        for mode, (count, total, longest) in self.pauses.items():
+            busy = "  <- busy mode" if mode in self.busy_modes and count else ""
+            lines.append(f"  {mode:<10} {count:>6} collections, {total * 1000:9.1f} ms total, "
+                         f"longest {longest * 1000:6.2f} ms{busy}")
+        return "\n".join(lines)
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+
+import pygame
+
+from font_fallback import MEMO_LIMIT, FontChain
+
+# ================= GLYPH ATLAS =================
+# Instead of one surface per string, every glyph is rasterized once into a
+# shared sheet per (font, size, color), and strings are composed by blitting
+# sub-rects of the sheet in a single Surface.blits call. Pen positions come
+# from font metrics: the advance of each character plus the kerning of each
+# pair (both measured with Font.size(), which never rasterizes, and memoized).
+#
+# After warm-up, typing only looks glyphs up; the rasterizer runs again only
+# for a character that was never seen or was evicted. The sheet has a fixed
+# number of cells, and when it is full the least recently used glyph gives
+# its cell to the new one, so a visitor mashing exotic codepoints cannot grow
+# it without bound.
+
+ATLAS_COLUMNS = 16
+ATLAS_CAPACITY = 256  # glyph cells per sheet
+
+
+class GlyphAtlas:
+    """
+    One sheet of glyphs of a FontChain in one color, with LRU eviction.
+    """
+
+    def __init__(self, chain, color, capacity=ATLAS_CAPACITY, columns=ATLAS_COLUMNS):
+        self.chain = chain
+        self.color = color
+        self.capacity = capacity
+        self.columns = columns
+        # Cells are a line high and wide enough for a square full-width glyph
+        self.cell_width = max(chain.height, max(font.size("M")[0] for font in chain.fonts))
+        self.cell_height = chain.height
+        rows = -(-capacity // columns)
+        self.sheet = pygame.Surface((columns * self.cell_width, rows * self.cell_height), pygame.SRCALPHA)
+        self._glyphs = OrderedDict()  # char -> (area, offset, cell), least recently used first
+        self._free = list(range(capacity - 1, -1, -1))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cell(self, index):
+        row, column = divmod(index, self.columns)
+        return pygame.Rect(column * self.cell_width, row * self.cell_height, self.cell_width, self.cell_height)
+
+    def glyph(self, char):
+        """
+        Returns (area, offset, cell) for char, rasterizing it if needed: area is
+        the inked sub-rect of the sheet, offset its position relative to the pen
+        and cell the sheet cell the glyph occupies.
+        """
+        entry = self._glyphs.get(char)
+        if entry is not None:
+            self.hits += 1
+            self._glyphs.move_to_end(char)
+            return entry
+
+        self.misses += 1
+        if self._free:
+            cell = self._cell(self._free.pop())
+        else:
+            self.evictions += 1
+            _, (_, _, cell) = self._glyphs.popitem(last=False)
+
+        # Transparent pixels carry the text color, so antialiased edges blend to it, not to black
+        self.sheet.fill((*self.color[:3], 0), cell)
+        font = self.chain.fonts[self.chain.font_index(char)]
+        glyph = font.render(char, True, self.color)
+        if self.chain.pool is not None:
+            self.chain.pool.track()
+        # Every glyph sits on the chain's shared baseline, whichever font drew it
+        self.sheet.set_clip(cell)
+        position = (cell.left, cell.top + self.chain.ascent - font.get_ascent())
+        self.sheet.blit(glyph, position)
+        self.sheet.set_clip(None)
+        # Only the inked pixels are blitted later, not the empty rows above and below
+        area = glyph.get_bounding_rect().move(position).clip(cell)
+        entry = self._glyphs[char] = (area, (area.left - cell.left, area.top - cell.top), cell)
+        return entry
+
+    def __len__(self):
+        return len(self._glyphs)
+
+
+class AtlasChain:
+    """
+    Text backend that composes strings from glyph atlases, one per color.
+    Has the same interface as FontChain (size, get_rect, draw).
+    """
+
+    name = "atlas"
+
+    def __init__(self, paths, size, capacity=ATLAS_CAPACITY, pool=None):
+        self.chain = FontChain(paths, size, pool)
+        self.capacity = capacity
+        self.height = self.chain.height
+        self._atlases = {}
+        self._advances = {}
+        self._kerning = {}
+
+    def atlas(self, color):
+        color = tuple(color)
+        atlas = self._atlases.get(color)
+        if atlas is None:
+            atlas = self._atlases[color] = GlyphAtlas(self.chain, color, self.capacity)
+        return atlas
+
+    def advance(self, char):
+        width = self._advances.get(char)
+        if width is None:
+            if len(self._advances) >= MEMO_LIMIT:
+                self._advances.clear()
+            width = self._advances[char] = self.chain.size(char)[0]
+        return width
+
+    def kerning(self, left, right):
+        """
+        Returns the kerning between two characters in pixels (0 across fonts).
+        """
+        pair = left + right
+        kern = self._kerning.get(pair)
+        if kern is None:
+            kern = 0
+            if self.chain.font_index(left)==self.chain.font_index(right):
+                kern = self.chain.size(pair)[0] - self.advance(left) - self.advance(right)
+            if len(self._kerning) >= MEMO_LIMIT:
+                self._kerning.clear()
+            self._kerning[pair] = kern
+        return kern
+
+    def positions(self, text):
+        """
+        Returns the pen x of every character of text and the total width.
+        """
+        xs = []
+        x = 0
+        previous = None
+        for char in text:
+            if previous is not None:
+                x += self.kerning(previous, char)
+            xs.append(x)
+            x += self.advance(char)
+            previous = char
+        return xs, x
+
+    def size(self, text):
+        return self.positions(text)[1], self.height
+
+    def get_rect(self, text, **position):
+        rect = pygame.Rect((0, 0), self.size(text))
+        for attribute, value in position.items():
+            setattr(rect, attribute, value)
+        return rect
+
+    def warm(self, chars, color):
+        """
+        Rasterizes chars into the atlas of color ahead of time.
+        """
+        atlas = self.atlas(color)
+        for char in chars:
+            atlas.glyph(char)
+
+    def draw(self, target, text, color, antialias=True, **position):
+        atlas = self.atlas(color)
+        if len(set(text)) > atlas.capacity:
+            # More distinct glyphs than cells: they could not all be in the sheet at once
+            return self.chain.draw(target, text, color, antialias, **position)
+
+        xs, width = self.positions(text)
+        rect = pygame.Rect((0, 0), (width, self.height))
+        for attribute, value in position.items():
+            setattr(rect, attribute, value)
+        sheet = atlas.sheet
+        left, top = rect.topleft
+        blits = []
+        for x, char in zip(xs, text):
+            area, (dx, dy), _ = atlas.glyph(char)
+            if area.width:
+                blits.append((sheet, (left + x + dx, top + dy), area))
+        target.blits(blits, doreturn=False)
+        return rect
+
+    def stats(self):
+        """
+        Returns (hits, misses, evictions) summed over all colors.
+        """
+        atlases = self._atlases.values()
+        return (sum(a.hits for a in atlases), sum(a.misses for a in atlases), sum(a.evictions for a in atlases))
@@ -0,0 +1,116 @@
+import pygame
+
+# ================= INPUT PIPELINE =================
+# During key mashing the kiosk used to run pygame.key.get_pressed(), define
+# remap_key() and append one character to a string for every single KEYDOWN.
+# Text also came from event.unicode, which misses IME and compose input such
+# as the fullwidth '，' found in collected_input.txt.
+#
+# The pipeline drains all of a frame's key and TEXTINPUT events into one
+# InputBatch instead:
+#   - typed text comes from TEXTINPUT, so composed characters arrive intact
+#   - consecutive text is joined and split only at Enter, so a frame appends
+#     once per segment
+#   - the keyboard layout is applied with a single str.translate call per segment
+#   - the quit combo and Enter are read from KEYDOWN as before
+
+# Backspace, Delete, Tab and Escape never add text (no backspace allowed): the first
+# two send no TEXTINPUT at all and control characters are stripped from the rest.
+ENTER_KEYS = (pygame.K_RETURN, pygame.K_KP_ENTER)
+
+# Control characters some platforms still deliver as text (tab, escape, ...)
+CONTROL_CHARS = dict.fromkeys(list(range(32)) + [127])
+
+
+class InputBatch:
+    """
+    Everything typed during one frame.
+
+    segments holds the text typed between Enter presses: segments[0] is the
+    text before the first Enter, and every further segment starts with an
+    Enter press. A frame without Enter has exactly one segment.
+    """
+
+    __slots__ = ("quit", "woke", "keys", "segments")
+
+    def __init__(self):
+        self.quit = False
+        self.woke = False  # the first key press woke the kiosk up (its text was dropped)
+        self.keys = 0  # number of KEYDOWN events
+        self.segments = [""]
+
+    @property
+    def enters(self):
+        return len(self.segments) - 1
+
+
+def layout_table(layout):
+    """
+    Builds a str.translate table from a {'q': 'x', ...} keyboard layout that
+    keeps the case of the typed letter.
+    """
+    table = {}
+    for key, letter in layout.items():
+        table[ord(key.lower())] = letter.lower()
+        table[ord(key.upper())] = letter.upper()
+    return table
+
+
+class InputPipeline:
+    """
+    Turns a frame's events into an InputBatch and applies the keyboard layout.
+    """
+
+    def __init__(self, layout=None, quit_key=pygame.K_c, quit_mod=pygame.KMOD_LCTRL):
+        self.quit_key = quit_key
+        self.quit_mod = quit_mod
+        self._table = {}
+        self._plain = CONTROL_CHARS
+        if layout is not None:
+            self.set_layout(layout)
+        self.events = 0
+        self.characters = 0
+
+    def set_layout(self, layout):
+        self._table = {**layout_table(layout), **CONTROL_CHARS}
+
+    def translate(self, text, remap=True):
+        """
+        Returns text with the layout applied (if remap) and control characters removed.
+        """
+        return text.translate(self._table if remap else self._plain)
+
+    def drain(self, events, waiting=False):
+        """
+        Collects the key and text events of one frame. With waiting set, the
+        first key press only wakes the kiosk up and its own text is dropped.
+        """
+        batch = InputBatch()
+        parts = []
+        swallow_text = False
+        for event in events:
+            if event.type==pygame.KEYDOWN:
+                self.events += 1
+                batch.keys += 1
+                swallow_text = False
+                if event.key==self.quit_key and event.mod & self.quit_mod:
+                    batch.quit = True
+                elif waiting and not batch.woke:
+                    batch.woke = True
+                    swallow_text = True  # the TEXTINPUT of this same key press follows
+                elif event.key in ENTER_KEYS:
+                    batch.segments[-1] = "".join(parts)
+                    batch.segments.append("")
+                    parts = []
+            elif event.type==pygame.TEXTINPUT:
+                self.events += 1
+                if swallow_text:
+                    swallow_text = False
+                elif waiting and not batch.woke:
+                    continue
+                else:
+                    parts.append(event.text)
+        if parts:
+            batch.segments[-1] = "".join(parts)
+        self.characters += sum(len(segment) for segment in batch.segments)
+        return batch
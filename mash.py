@@ -0,0 +1,346 @@
+import math
+import string
+import sys
+from collections import Counter, deque
+
+# ================= KEYBOARD MASH ANALYSIS =================
+# Much of what visitors type is mashing ("fjckyfephyoephyo") or a held key
+# ("pppp"). The features used to recognize it work on physical keys, i.e. on
+# text before the kiosk's keyboard remap (or de-scrambled afterwards):
+#
+#   adjacency - consecutive keys that are neighbours on a QWERTY keyboard
+#   repeats   - stretches that repeat with a short period ("pppp", "ephyoephyo")
+#   entropy   - how evenly the key pairs (bigrams) are spread: a held key or a
+#               short pattern reuses the same few bigrams over and over
+#   vowels    - mashed text has far fewer vowels than words do
+#
+# mash_score() judges a whole string after the fact (analytics.py).
+# MashDetector keeps the same features for the kiosk while a visitor types:
+# every key updates rolling counts over the last few keys in O(1) (the bigram
+# counts too: the pair leaving the window is counted out), so the score
+# is ready at any time without re-scanning the answer. Both give the same score
+# for the same keys; to check that on a log:
+#
+#   python mash.py [collected_input.txt] [window]
+
+# QWERTY rows and the horizontal stagger of each row, in key widths
+QWERTY_ROWS = ("1234567890-=", "qwertyuiop[]", "asdfghjkl;'", "zxcvbnm,./")
+ROW_OFFSETS = (0.0, 0.5, 0.75, 1.25)
+VOWELS = frozenset("aeiouy")
+WORD_VOWEL_RATIO = 0.3  # roughly the share of vowels in English text
+MIN_KEYS = 4  # shorter inputs ("yes", "no") are too short to judge
+
+KEY_POSITIONS = {char: (column + ROW_OFFSETS[row], row)
+                 for row, keys in enumerate(QWERTY_ROWS) for column, char in enumerate(keys)}
+
+
+def _adjacency():
+    adjacent = {char: set() for char in KEY_POSITIONS}
+    for a, (ax, ay) in KEY_POSITIONS.items():
+        for b, (bx, by) in KEY_POSITIONS.items():
+            if a!=b and abs(ay - by) <= 1 and abs(ax - bx) <= 1:
+                adjacent[a].add(b)
+    return {char: frozenset(neighbours) for char, neighbours in adjacent.items()}
+
+
+ADJACENT_KEYS = _adjacency()
+
+# The fixed layout Final_5.0 and the early sessions of collected_input.txt were typed with:
+# the top row becomes A-J, the home row K-S and the bottom row T-Z
+ALPHABETICAL_LAYOUT = dict(zip("qwertyuiopasdfghjklzxcvbnm", string.ascii_lowercase))
+
+
+def adjacent(a, b):
+    """
+    True if keys a and b are next to each other on a QWERTY keyboard.
+    """
+    return b in ADJACENT_KEYS.get(a, ())
+
+
+def repeated_runs(text, max_period=8, min_repeats=2, min_length=4):
+    """
+    Returns (start, period, length) for every stretch of text that repeats a
+    unit of at most max_period characters: "pppp" is (0, 1, 4) and
+    "ephyoephyoephyo" is (0, 5, 15). The smallest period wins.
+    """
+    runs = []
+    n = len(text)
+    i = 0
+    while i < n:
+        found = None
+        for period in range(1, max_period + 1):
+            j = i
+            while j + period < n and text[j + period]==text[j]:
+                j += 1
+            length = j - i + period
+            if j > i and length >= max(min_length, period * min_repeats):
+                found = (i, period, length)
+                break
+        if found is None:
+            i += 1
+        else:
+            runs.append(found)
+            i += found[2]
+    return runs
+
+
+def repeating_keys(keys, max_period=8, min_length=4):
+    """
+    Returns one flag per key: True if the key is inside any stretch that
+    repeats a unit of at most max_period keys (by the rule of repeated_runs,
+    but overlapping stretches of different periods all count).
+    """
+    covered = [False] * len(keys)
+    for period in range(1, max_period + 1):
+        threshold = max(min_length - period, period)
+        streak = 0
+        for j in range(period, len(keys) + 1):
+            if j < len(keys) and keys[j]==keys[j - period]:
+                streak += 1
+                continue
+            if streak >= threshold:
+                # keys[j - streak:j] each equal the key period back: the stretch starts period earlier
+                covered[j - streak - period:j] = [True] * (streak + period)
+            streak = 0
+    return covered
+
+
+def _weight(count):
+    return count * math.log2(count) if count > 1 else 0.0
+
+
+def bigram_entropy(pairs, weight):
+    """
+    Entropy of pairs bigrams whose counts c add up to weight = sum(c * log2(c)),
+    normalized to 0..1 (1: no bigram repeats).
+    """
+    if pairs < 2:
+        return 1.0
+    return max(0.0, math.log2(pairs) - weight / pairs) / math.log2(pairs)
+
+
+def mash_features(keys, window=None):
+    """
+    Returns (adjacency, repeats, entropy, vowel gap) of a string of physical
+    keys, each 0..1. With a window, of its last window keys (repetitions are
+    still found with the keys before them), which is what MashDetector(window)
+    scores.
+    """
+    keys = [char for char in keys.lower() if not char.isspace()]
+    covered = repeating_keys(keys)
+    if window is not None:
+        keys, covered = keys[-window:], covered[-window:]
+    if len(keys) < MIN_KEYS:
+        return 0.0, 0.0, 1.0, 0.0
+    pairs = len(keys) - 1
+    adjacency = sum(1 for a, b in zip(keys, keys[1:]) if adjacent(a, b)) / pairs
+    repeats = sum(covered) / len(keys)
+    bigrams = Counter(a + b for a, b in zip(keys, keys[1:]))
+    entropy = bigram_entropy(pairs, sum(_weight(count) for count in bigrams.values()))
+    letters = [char for char in keys if char.isalpha()]
+    vowel_ratio = sum(1 for char in letters if char in VOWELS) / len(letters) if letters else 0.0
+    vowel_gap = max(0.0, 1 - vowel_ratio / WORD_VOWEL_RATIO)
+    return adjacency, repeats, entropy, vowel_gap
+
+
+def combine(adjacency, repeats, entropy, vowel_gap):
+    """
+    The mash score of the features: neighbouring keys, repetition or a low
+    bigram entropy is enough; missing vowels add to it.
+    """
+    return min(1.0, 0.8 * max(adjacency, repeats, 1 - entropy) + 0.2 * vowel_gap)
+
+
+def mash_score(keys, window=None):
+    """
+    How much a string of physical keys looks like keyboard mashing, 0..1.
+    """
+    return combine(*mash_features(keys, window))
+
+
+def layout_inverse(layout):
+    """
+    Returns a str.translate table that turns remapped text back into the keys
+    that were pressed, for a {'q': 'a', ...} layout (or its 26-letter string
+    form, the letters typed by the keys a-z).
+    """
+    if isinstance(layout, str):
+        layout = dict(zip(string.ascii_lowercase, layout))
+    table = {}
+    for key, letter in layout.items():
+        table[ord(letter.lower())] = key.lower()
+        table[ord(letter.upper())] = key.upper()
+    return table
+
+
+class MashDetector:
+    """
+    Online mash score over the last window physical keys. feed() costs O(1)
+    per key (O(max_period)); score and the features are read without scanning.
+
+    Features over the window:
+      adjacency  - share of consecutive key pairs that are QWERTY neighbours
+      repetition - share of keys inside a repeated run (a key equal to the one
+                   period keys back, for long enough)
+      entropy    - normalized entropy of the bigram counts; each count is kept
+                   with the running sum of c * log2(c), so it is O(1) as well
+      vowel gap  - as in mash_features()
+
+    The score equals mash_score(keys, window) of everything fed since the last
+    reset; for answers no longer than the window, mash_score(keys).
+    """
+
+    def __init__(self, window=24, max_period=8, min_length=4):
+        self.window = window
+        self.max_period = max_period
+        self.min_length = min_length
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets all keys, e.g. when a new answer starts.
+        """
+        # Per key in the window: [bigram with the key before or None, adjacent, repeating, letter, vowel]
+        self._entries = deque()
+        self._history = deque(maxlen=self.max_period)  # the keys before the newest, newest last
+        self._streaks = [0] * (self.max_period + 1)  # per period: keys in a row equal to period back
+        self._bigrams = Counter()
+        self._bigram_weight = 0.0  # sum of c * log2(c) over the bigram counts
+        self.pairs = 0  # consecutive key pairs in the window
+        self.adjacent = 0
+        self.repeating = 0
+        self.letters = 0
+        self.vowels = 0
+        self.keys = 0  # keys fed since the last reset
+
+    def feed(self, text):
+        """
+        Adds the keys of text, the characters as typed before any remapping.
+        """
+        for char in text.lower():
+            if not char.isspace():
+                self._add(char)
+
+    def _add(self, key):
+        history = self._history
+        previous = history[-1] if history else None
+
+        bigram = None
+        if previous is not None:
+            bigram = previous + key
+            self._count_bigram(bigram, 1)
+        is_adjacent = previous is not None and adjacent(previous, key)
+
+        repeating = False
+        run = 0  # keys before this one that a newly found run covers
+        streaks = self._streaks
+        for period in range(1, self.max_period + 1):
+            if len(history) >= period and history[-period]==key:
+                streaks[period] += 1
+                threshold = max(self.min_length - period, period)
+                if streaks[period] >= threshold:
+                    repeating = True
+                    if streaks[period]==threshold:
+                        run = max(run, threshold + period - 1)
+            else:
+                streaks[period] = 0
+
+        entries = self._entries
+        # The run's first keys were not known to repeat when they were typed; each
+        # key is marked at most once, so this stays O(1) per key on average
+        for index in range(1, min(run, len(entries)) + 1):
+            entry = entries[-index]
+            if not entry[2]:
+                entry[2] = True
+                self.repeating += 1
+
+        letter = key.isalpha()
+        vowel = key in VOWELS
+        entries.append([bigram, is_adjacent, repeating, letter, vowel])
+        self.pairs += bigram is not None
+        self.adjacent += is_adjacent
+        self.repeating += repeating
+        self.letters += letter
+        self.vowels += vowel
+        history.append(key)
+        self.keys += 1
+
+        if len(entries) > self.window:
+            _, _, repeating, letter, vowel = entries.popleft()
+            # The oldest key left now starts the window: its pair with the dropped key goes too
+            oldest = entries[0]
+            if oldest[0] is not None:
+                self._count_bigram(oldest[0], -1)
+                oldest[0] = None
+                self.pairs -= 1
+                self.adjacent -= oldest[1]
+                oldest[1] = False
+            self.repeating -= repeating
+            self.letters -= letter
+            self.vowels -= vowel
+
+    def _count_bigram(self, bigram, delta):
+        count = self._bigrams[bigram]
+        new = count + delta
+        self._bigram_weight += _weight(new) - _weight(count)
+        if new:
+            self._bigrams[bigram] = new
+        else:
+            del self._bigrams[bigram]
+
+    def features(self):
+        """
+        Returns (adjacency, repetition, entropy, vowel gap), each 0..1, like mash_features().
+        """
+        size = len(self._entries)
+        if size < MIN_KEYS:
+            return 0.0, 0.0, 1.0, 0.0
+        adjacency = self.adjacent / max(1, self.pairs)
+        repetition = self.repeating / size
+        entropy = bigram_entropy(self.pairs, self._bigram_weight)
+        vowel_ratio = self.vowels / self.letters if self.letters else 0.0
+        return adjacency, repetition, entropy, max(0.0, 1 - vowel_ratio / WORD_VOWEL_RATIO)
+
+    @property
+    def score(self):
+        """
+        Mash score of the last window keys, 0..1, weighted like mash_score().
+        """
+        return combine(*self.features())
+
+
+def check_detector(lines, window):
+    """
+    Returns (line, online, batch) for every line on which MashDetector(window)
+    and mash_features(line, window) disagree; online and batch are the four
+    features followed by the score.
+    """
+    detector = MashDetector(window)
+    mismatches = []
+    for line in lines:
+        detector.reset()
+        detector.feed(line)
+        online = detector.features() + (detector.score,)
+        batch = mash_features(line, window) + (mash_score(line, window),)
+        if any(abs(a - b) > 1e-9 for a, b in zip(online, batch)):
+            mismatches.append((line, online, batch))
+    return mismatches
+
+
+def main():
+    # python mash.py [collected_input.txt] [window]: checks that the kiosk's online
+    # score and the batch score of analytics.py agree on every line of a log
+    path = sys.argv[1] if len(sys.argv) > 1 else "collected_input.txt"
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    with open(path, encoding="utf-8") as f:
+        lines = [line.rstrip("\n") for line in f if line.strip()]
+    mismatches = check_detector(lines, window)
+    for line, online, batch in mismatches[:20]:
+        print(f"  online {' '.join(f'{value:.3f}' for value in online)}  "
+              f"batch {' '.join(f'{value:.3f}' for value in batch)}  {line!r}")
+    print(f"{len(lines) - len(mismatches)} of {len(lines)} lines agree (window {window})")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__=="__main__":
+    main()
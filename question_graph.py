@@ -0,0 +1,200 @@
+# ================= QUESTION GRAPH =================
+# Questions can branch on how the visitor answered. The graph is described in
+# the content file under "question_graph":
+#
+# "question_graph": {
+#     "start": "trust",
+#     "nodes": [
+#         {"id": "trust", "text": "Do you trust me?",
+#          "next": [{"if": {"empty": true}, "to": "silent"},
+#                   {"if": {"min_length": 20}, "to": "talkative"},
+#                   {"to": "hide"}]},
+#         {"id": "hide", "text": "Do you have something to hide?", "timeout": 5},
+#         {"id": "last", "text": "Tell me about you.", "remap": false, "font_size": 40,
+#          "next": [{"to": "end"}]}
+#     ]
+# }
+#
+# Node properties:
+#   remap      - remap the visitor's keys while answering (default true)
+#   timeout    - seconds of silence before the answer is taken (default: question_mode_timeout)
+#   font_size  - size of the question text (default: the kiosk's question font)
+#
+# Edge conditions (all conditions of one edge must hold, first matching edge wins):
+#   empty               - the answer is (not) blank
+#   min_length/max_length - length of the answer in characters
+#   min_speed/max_speed - typing speed in characters per second
+#   min_mash/max_mash   - keyboard-mash score of the answer, 0..1 (see mash.py)
+#
+# An edge without "if" always matches. A node without "next" goes on to the
+# following node in the list, and "end" finishes the session, as does a node
+# where none of the edges match.
+
+INF = float("inf")
+
+# Positions of the fields in a compiled transition row
+(ROW_EMPTY, ROW_MIN_LEN, ROW_MAX_LEN, ROW_MIN_SPEED, ROW_MAX_SPEED,
+ ROW_MIN_MASH, ROW_MAX_MASH, ROW_TARGET) = range(8)
+
+EDGE_CONDITIONS = ("empty", "min_length", "max_length", "min_speed", "max_speed", "min_mash", "max_mash")
+
+
+class QuestionNode:
+    """
+    One question and its per-question properties.
+    """
+
+    __slots__ = ("id", "text", "remap", "timeout", "font_size")
+
+    def __init__(self, id, text, remap=True, timeout=None, font_size=None):
+        self.id = id
+        self.text = text
+        self.remap = remap
+        self.timeout = timeout
+        self.font_size = font_size
+
+
+class QuestionGraph:
+    """
+    Questions compiled into a flat transition table. Node i's outgoing edges are
+    transitions[i], a tuple of rows (empty, min_len, max_len, min_speed,
+    max_speed, min_mash, max_mash, target) with the open bounds already filled in, so picking the
+    next question never looks anything up by id.
+
+    Node indexes run from 0 to len(nodes) - 1; the index len(nodes) is the end
+    of the session, so `index < len(graph)` means a question is still open.
+    """
+
+    def __init__(self, nodes, transitions, start=0):
+        self.nodes = tuple(nodes)
+        self.transitions = tuple(transitions)
+        self.start = start
+        self.end = len(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, index):
+        return self.nodes[index]
+
+    def texts(self):
+        return tuple(node.text for node in self.nodes)
+
+    def next_index(self, index, answer, duration, mash=0.0):
+        """
+        Returns the index of the question that follows node index, given the
+        answer typed, the seconds spent typing it and its mash score. The end
+        of the session stays the end.
+        """
+        if index >= self.end:
+            return self.end
+        length = len(answer)
+        empty = answer.strip()==""
+        speed = length / duration if duration > 0 else 0.0
+        for row in self.transitions[index]:
+            if row[ROW_EMPTY] is not None and row[ROW_EMPTY]!=empty:
+                continue
+            if not row[ROW_MIN_LEN] <= length <= row[ROW_MAX_LEN]:
+                continue
+            if not row[ROW_MIN_SPEED] <= speed <= row[ROW_MAX_SPEED]:
+                continue
+            if not row[ROW_MIN_MASH] <= mash <= row[ROW_MAX_MASH]:
+                continue
+            return row[ROW_TARGET]
+        return self.end
+
+
+def linear_graph(questions):
+    """
+    Builds the graph the kiosk always used: every question in order, and the
+    last one is answered with the visitor's real keyboard.
+    """
+    nodes = [QuestionNode(str(i), text) for i, text in enumerate(questions)]
+    if nodes:
+        nodes[-1].remap = False
+    transitions = [((None, 0, INF, 0, INF, 0, INF, i + 1),) for i in range(len(nodes))]
+    return QuestionGraph(nodes, transitions)
+
+
+def _number(node_id, name, value, default):
+    """
+    value if it is a number (not a bool), default if it is missing.
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"question '{node_id}': '{name}' must be a number")
+    return value
+
+
+def _flag(node_id, name, value, default):
+    if value is None:
+        return default
+    if not isinstance(value, bool):
+        raise ValueError(f"question '{node_id}': '{name}' must be true or false")
+    return value
+
+
+def compile_graph(spec):
+    """
+    Compiles a "question_graph" description into a QuestionGraph.
+    Raises ValueError on unknown ids, conditions or malformed nodes.
+    """
+    node_specs = spec.get("nodes")
+    if not isinstance(node_specs, list) or not node_specs:
+        raise ValueError("question_graph needs a non-empty 'nodes' list")
+
+    nodes = []
+    ids = {}
+    for i, node_spec in enumerate(node_specs):
+        node_id = str(node_spec.get("id", i))
+        text = node_spec.get("text")
+        if not isinstance(text, str):
+            raise ValueError(f"question '{node_id}' has no text")
+        if node_id in ids or node_id=="end":
+            raise ValueError(f"duplicate question id '{node_id}'")
+        ids[node_id] = i
+        timeout = _number(node_id, "timeout", node_spec.get("timeout"), None)
+        font_size = _number(node_id, "font_size", node_spec.get("font_size"), None)
+        if (timeout is not None and timeout <= 0) or (font_size is not None and font_size <= 0):
+            raise ValueError(f"question '{node_id}': 'timeout' and 'font_size' must be positive")
+        nodes.append(QuestionNode(node_id, text,
+                                  remap=_flag(node_id, "remap", node_spec.get("remap"), True),
+                                  timeout=timeout,
+                                  font_size=font_size))
+    ids["end"] = len(nodes)
+
+    def resolve(node_id, target):
+        if target not in ids:
+            raise ValueError(f"question '{node_id}' points to unknown question '{target}'")
+        return ids[target]
+
+    transitions = []
+    for i, node_spec in enumerate(node_specs):
+        node_id = nodes[i].id
+        edges = node_spec.get("next")
+        if edges is None:
+            # Fall through to the next question in the list
+            transitions.append(((None, 0, INF, 0, INF, 0, INF, i + 1),))
+            continue
+
+        rows = []
+        for edge in edges:
+            condition = edge.get("if", {})
+            for key in condition:
+                if key not in EDGE_CONDITIONS:
+                    raise ValueError(f"question '{node_id}' has unknown condition '{key}'")
+            rows.append((
+                _flag(node_id, "empty", condition.get("empty"), None),
+                _number(node_id, "min_length", condition.get("min_length"), 0),
+                _number(node_id, "max_length", condition.get("max_length"), INF),
+                _number(node_id, "min_speed", condition.get("min_speed"), 0),
+                _number(node_id, "max_speed", condition.get("max_speed"), INF),
+                _number(node_id, "min_mash", condition.get("min_mash"), 0),
+                _number(node_id, "max_mash", condition.get("max_mash"), INF),
+                resolve(node_id, str(edge.get("to", "end"))),
+            ))
+        transitions.append(tuple(rows))
+
+    start = resolve("start", str(spec.get("start", nodes[0].id)))
+    return QuestionGraph(nodes, transitions, start)
@@ -0,0 +1,142 @@
+import pygame
+
+# ================= SESSION RECAP =================
+# The thank you screen can show the visitor's questions and answers. The recap
+# used to be drawn line by line at fixed y increments on every frame and ran
+# off the screen once there were more than a handful of questions.
+#
+# RecapRenderer lays the Q&A out once per session into off-screen pages:
+# lines are word-wrapped, flowed into columns and, if even the smallest font
+# does not fit, split into pages. Fitting only measures text with Font.size()
+# and Font.get_linesize(); nothing is rasterized until the final layout is known.
+
+
+def wrap_text(font, text, max_width):
+    """
+    Splits text into lines no wider than max_width. Words longer than a line
+    (visitors mash keys, so this is common) are broken between characters.
+    """
+    lines = []
+    line = ""
+    for word in text.split(" "):
+        candidate = word if line=="" else line + " " + word
+        if font.size(candidate)[0] <= max_width:
+            line = candidate
+            continue
+        if line!="":
+            lines.append(line)
+        line = ""
+        for char in word:
+            if line and font.size(line + char)[0] > max_width:
+                lines.append(line)
+                line = ""
+            line += char
+    lines.append(line)
+    return lines
+
+
+class RecapRenderer:
+    """
+    Lays out (question, answer) pairs into one or more pre-rendered pages of a
+    fixed size. The result is cached until the Q&A or the page size changes.
+    """
+
+    def __init__(self, make_font, color, sizes=(28, 24, 20, 18, 16), max_columns=3,
+                 column_gap=40, line_gap=5, answer_prefix="Your input: ", pool=None):
+        self.make_font = make_font  # called with a point size, returns a pygame font or a FontChain
+        self.pool = pool  # SurfacePool the pages are borrowed from
+        self.color = color
+        self.sizes = sizes
+        self.max_columns = max_columns
+        self.column_gap = column_gap
+        self.line_gap = line_gap
+        self.answer_prefix = answer_prefix
+        self._fonts = {}
+        self._key = None
+        self._pages = []
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = self.make_font(size)
+        return font
+
+    def _flow(self, q_and_a, font, columns, width, height):
+        """
+        Returns the pages of a layout as lists of (text, x, y), using only font metrics.
+        """
+        column_width = (width - (columns - 1) * self.column_gap) // columns
+        line_height = font.get_linesize() + self.line_gap
+        if column_width <= 0 or line_height > height:
+            return None
+
+        pages = [[]]
+        column = 0
+        y = 0
+        for question, answer in q_and_a:
+            lines = wrap_text(font, question, column_width)
+            lines += wrap_text(font, self.answer_prefix + answer, column_width)
+            entry_height = len(lines) * line_height
+            # Keep a Q&A pair in one column unless it is taller than a whole column
+            if y > 0 and y + entry_height > height and entry_height <= height:
+                column, y = column + 1, 0
+            for line in lines:
+                if y + line_height > height:
+                    column, y = column + 1, 0
+                if column==columns:
+                    pages.append([])
+                    column = 0
+                pages[-1].append((line, column * (column_width + self.column_gap), y))
+                y += line_height
+            y += line_height // 2  # blank space between pairs
+        return pages
+
+    def layout(self, q_and_a, width, height):
+        """
+        Picks the largest font size, then the fewest columns, that fit the
+        whole recap on one page. Falls back to pages at the smallest size.
+        Returns (font, pages).
+        """
+        for size in self.sizes:
+            font = self.font(size)
+            for columns in range(1, self.max_columns + 1):
+                pages = self._flow(q_and_a, font, columns, width, height)
+                if pages is not None and len(pages)==1:
+                    return font, pages
+        font = self.font(self.sizes[-1])
+        return font, self._flow(q_and_a, font, self.max_columns, width, height) or [[]]
+
+    def render(self, q_and_a, size):
+        """
+        Returns the list of page surfaces for q_and_a laid out in size (width, height).
+        """
+        key = (tuple(q_and_a), tuple(size))
+        if key==self._key:
+            return self._pages
+
+        font, layout = self.layout(q_and_a, size[0], size[1])
+        if self.pool is not None:
+            # The previous session's pages have the same size; the new ones reuse them
+            for page in self._pages:
+                self.pool.release(page)
+        pages = []
+        for page_lines in layout:
+            if self.pool is not None:
+                page = self.pool.acquire(size, pygame.SRCALPHA)
+                page.fill((0, 0, 0, 0))
+                self.pool.track(len(page_lines))
+            else:
+                page = pygame.Surface(size, pygame.SRCALPHA)
+            page.blits([(font.render(text, True, self.color), (x, y)) for text, x, y in page_lines],
+                       doreturn=False)
+            pages.append(page)
+        self._key = key
+        self._pages = pages
+        return pages
+
+    def page_at(self, q_and_a, size, elapsed, page_duration):
+        """
+        Returns the page to show after elapsed seconds, turning pages every page_duration seconds.
+        """
+        pages = self.render(q_and_a, size)
+        return pages[int(elapsed // page_duration) % len(pages)]
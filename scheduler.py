@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import time
+import types
+
+# ================= FRAME BUDGET SCHEDULER =================
+# Work that does not have to happen in a particular frame (flushing the answer
+# logs, laying out the recap, warming caches after a content reload) used to
+# run inline, in whatever frame triggered it. The scheduler runs it between
+# frames instead, cooperatively:
+#
+#   frame jobs - run after every frame, most urgent first, until the per-frame
+#                budget (budget_ms) is spent
+#   idle jobs  - run only in the time left over after render and flip, or in
+#                Waiting Mode where no visitor is waiting on the next frame
+#
+# A job is a callable. If calling it returns a generator, the job is resumed
+# one step (one next()) at a time, so long jobs are split across frames by
+# yielding. A step that ends past its deadline counts as a budget overrun.
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+IDLE_MARGIN_MS = 2.0  # slack kept free in front of the next frame
+
+
+class Job:
+    """
+    A submitted job and its accounting.
+    """
+
+    __slots__ = ("name", "priority", "idle", "func", "args", "generator", "steps", "seconds", "done")
+
+    def __init__(self, name, priority, idle, func, args):
+        self.name = name
+        self.priority = priority
+        self.idle = idle
+        self.func = func
+        self.args = args
+        self.generator = None
+        self.steps = 0
+        self.seconds = 0.0
+        self.done = False
+
+    def step(self):
+        """
+        Runs one step. Returns True once the job is finished.
+        """
+        if self.func is not None:
+            result = self.func(*self.args)
+            self.func = self.args = None
+            if not isinstance(result, types.GeneratorType):
+                return True
+            self.generator = result
+        try:
+            next(self.generator)
+        except StopIteration:
+            return True
+        return False
+
+
+class FrameScheduler:
+    """
+    Priority queues of frame and idle jobs, run cooperatively between frames.
+    """
+
+    def __init__(self, budget_ms=2.0, idle_margin_ms=IDLE_MARGIN_MS):
+        self.budget_ms = budget_ms
+        self.idle_margin_ms = idle_margin_ms
+        self._queues = {False: [], True: []}  # idle -> heap of (priority, order, job)
+        self._order = itertools.count()
+        self.completed = 0
+        self.overruns = 0
+        self.busy_seconds = 0.0
+
+    def submit(self, func, *args, name=None, priority=PRIORITY_NORMAL, idle=False):
+        """
+        Queues func(*args). Lower priority values run first. Returns the Job.
+        """
+        job = Job(name or getattr(func, "__name__", "job"), priority, idle, func, args)
+        heapq.heappush(self._queues[idle], (priority, next(self._order), job))
+        return job
+
+    def pending(self, name):
+        """
+        True if a job called name is queued and not finished.
+        """
+        return any(job.name==name for queue in self._queues.values() for _, _, job in queue)
+
+    def queue_lengths(self):
+        return {"frame": len(self._queues[False]), "idle": len(self._queues[True])}
+
+    def run(self, slack_ms=0.0, idle=False):
+        """
+        Runs queued jobs after a frame. slack_ms is the time left until the next
+        frame is due; idle is True when nobody is waiting on the frame (Waiting
+        Mode). Returns the number of steps run.
+        """
+        start = time.perf_counter()
+        steps = self._run_queue(self._queues[False], start + self.budget_ms / 1000)
+
+        idle_ms = slack_ms - self.idle_margin_ms
+        if idle:
+            idle_ms = max(idle_ms, self.budget_ms)
+        if idle_ms > 0:
+            steps += self._run_queue(self._queues[True], start + idle_ms / 1000)
+        self.busy_seconds += time.perf_counter() - start
+        return steps
+
+    def _run_queue(self, queue, deadline):
+        steps = 0
+        while queue and time.perf_counter() < deadline:
+            entry = queue[0]
+            job = entry[2]
+            step_start = time.perf_counter()
+            try:
+                finished = job.step()
+            except Exception as e:
+                print(f"Scheduled job '{job.name}' failed: {e}")
+                finished = True
+            now = time.perf_counter()
+            job.steps += 1
+            job.seconds += now - step_start
+            steps += 1
+            if now > deadline:
+                self.overruns += 1
+            if finished:
+                job.done = True
+                if queue[0] is entry:
+                    heapq.heappop(queue)
+                else:  # the step submitted a more urgent job
+                    queue.remove(entry)
+                    heapq.heapify(queue)
+                self.completed += 1
+        return steps
+
+    def report(self):
+        lengths = self.queue_lengths()
+        return (f"Scheduler: {self.completed} jobs completed in {self.busy_seconds * 1000:.1f} ms, "
+                f"{self.overruns} budget overruns, {lengths['frame']} frame / {lengths['idle']} idle jobs queued")
@@ -0,0 +1,144 @@
+import json
+from multiprocessing.connection import Client
+
+# ================= SESSION LOG =================
+# What visitors type is kept in two append-only files:
+#
+#   collected_input.txt - one line per free input and per answer, as the
+#                         earlier versions of the kiosk wrote it
+#   sessions.jsonl      - one JSON object per session with the questions,
+#                         answers and timing, for the analytics tools
+#
+# Lines are buffered in memory while a session runs and written by flush(),
+# which the kiosk schedules as an idle job, so no frame waits on the disk.
+#
+# When several stations run from one host (stations.py), each kiosk uses a
+# RemoteSessionLog instead: flush() sends the buffered lines and records to the
+# launcher's single writer process, which owns the shared files, so stations
+# never contend for them.
+
+
+class SessionLog:
+    """
+    Buffered writer for collected_input.txt and sessions.jsonl.
+    """
+
+    def __init__(self, text_path="collected_input.txt", sessions_path="sessions.jsonl"):
+        self.text_path = text_path
+        self.sessions_path = sessions_path
+        self._lines = []
+        self._sessions = []
+        self.sessions_written = 0
+        self.failures = 0
+
+    def add_text(self, text):
+        """
+        Queues one free input or answer for collected_input.txt.
+        """
+        if text.strip()!="":
+            self._lines.append(text)
+
+    def add_session(self, record):
+        """
+        Queues one session record (a JSON-serializable dict) for sessions.jsonl.
+        """
+        self._sessions.append(record)
+
+    @property
+    def pending(self):
+        return len(self._lines) + len(self._sessions)
+
+    def state(self):
+        """
+        What is queued and not written yet, for the session journal (see watchdog.py).
+        """
+        return {"lines": list(self._lines), "sessions": list(self._sessions)}
+
+    def restore(self, state):
+        """
+        Queues again what a previous run had not written when it stopped.
+        """
+        self._lines.extend(state["lines"])
+        self._sessions.extend(state["sessions"])
+
+    def flush(self):
+        """
+        Appends everything queued to the log files. What cannot be written
+        (disk full, permissions) stays queued for the next flush.
+        """
+        try:
+            if self._lines:
+                with open(self.text_path, "a", encoding="utf-8") as f:
+                    f.write("".join(line + "\n" for line in self._lines))
+                self._lines = []
+            if self._sessions:
+                with open(self.sessions_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in self._sessions))
+                self.sessions_written += len(self._sessions)
+                self._sessions = []
+        except OSError as e:
+            if not self.failures:
+                print(f"Could not write the session log, keeping it queued: {e}")
+            self.failures += 1
+
+    def close(self):
+        pass
+
+
+class RemoteSessionLog(SessionLog):
+    """
+    A SessionLog that flushes to the log writer at address (see stations.py)
+    instead of to the files. Session records are tagged with the station name.
+    If the writer cannot be reached, everything stays queued for the next flush.
+    """
+
+    def __init__(self, address, station, authkey=None):
+        super().__init__(None, None)
+        self.address = address
+        self.station = station
+        self.authkey = authkey
+        self._connection = None
+
+    def add_session(self, record):
+        record["station"] = self.station
+        super().add_session(record)
+
+    def flush(self):
+        if not self._lines and not self._sessions:
+            return
+        try:
+            if self._connection is None:
+                self._connection = Client(self.address, authkey=self.authkey)
+                self._connection.send(("hello", self.station))
+            self._connection.send(("log", self._lines, self._sessions))
+        except (OSError, EOFError) as e:
+            if not self.failures:
+                print(f"Log writer at {self.address} not reachable, keeping the log queued: {e}")
+            self.failures += 1
+            self._connection = None
+            return
+        self.sessions_written += len(self._sessions)
+        self._lines = []
+        self._sessions = []
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def record_answers(record):
+    """
+    Returns ([(question, text, remapped), ...], malformed) for the answers of a
+    sessions.jsonl record: answers that are not a [question, text(, remapped)]
+    list of strings are left out and only counted.
+    """
+    answers = record.get("answers") or []
+    if not isinstance(answers, list):
+        return [], 1
+    valid = []
+    for answer in answers:
+        if isinstance(answer, list) and len(answer) >= 2 and isinstance(answer[0], str) \
+                and isinstance(answer[1], str):
+            valid.append((answer[0], answer[1], bool(answer[2]) if len(answer) > 2 else True))
+    return valid, len(answers) - len(valid)
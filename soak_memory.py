@@ -0,0 +1,222 @@
+import argparse
+import importlib.util
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Runs without a window or sound
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from content import load_content
+
+# ================= MEMORY SOAK TEST =================
+# The exhibit runs for weeks and goes through WAITING -> INPUT -> QUESTION ->
+# THANK_YOU thousands of times. This harness runs the real kiosk main() headless
+# and drives accelerated synthetic sessions through it:
+#
+#   - the kiosk's clock is replaced by a virtual one that jumps ahead by each
+#     scripted step, so a 10 second thank you screen takes a few frames
+#   - pygame.event.get is fed a script of KEYDOWN + TEXTINPUT events: wake-up
+#     key, free input, Enter, an answer per question, then idle time
+#
+# Every --every sessions it takes a tracemalloc snapshot and reads the process
+# RSS. At the end it prints the RSS over time and the allocation sites that grew
+# most since the first snapshot (taken after warm-up), and exits with 1 when
+# traced memory or RSS grew by more than the thresholds per session.
+#
+#   python soak_memory.py [--sessions 300] [--every 50] [--max-growth-kb 4] [--max-rss-growth-kb 64]
+#
+# The kiosk runs in a temporary folder, so its logs do not touch collected_input.txt.
+
+KIOSK_SCRIPT = "Final_5.1.py"
+FILES = ("bulletin.regular.ttf", "TypeLightSans-KV84p.otf", "content.json")
+CANVAS_SIZE = (640, 360)  # small canvas: the soak is about memory, not pixels
+TYPING_STEP = 0.08  # virtual seconds between typed keys
+# Mostly letters, plus characters that go through the font fallback chain
+ALPHABET = string.ascii_lowercase * 4 + "ABCXYZ0123 ,.?éü，。"
+
+
+class VirtualClock:
+    """
+    Stands in for the time module inside the kiosk: time() only moves when the
+    harness advances it.
+    """
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def key_events(char, key=None):
+    """
+    Events of one key press: KEYDOWN plus TEXTINPUT, or only KEYDOWN for a non-text key.
+    """
+    if key is not None:
+        return [pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode=char, scancode=0)]
+    return [pygame.event.Event(pygame.KEYDOWN, key=ord(char.lower()) if char.isascii() else 0,
+                               mod=0, unicode=char, scancode=0),
+            pygame.event.Event(pygame.TEXTINPUT, text=char)]
+
+
+def session_script(rng, answers, timings):
+    """
+    Yields (seconds to advance, events) steps for one synthetic session.
+    """
+    yield timings["waiting_mode_sentence_interval"] * 1.5, []
+    yield 0.1, key_events("a")  # wakes the kiosk up
+    for _ in range(rng.randint(3, 20)):
+        yield TYPING_STEP, key_events(rng.choice(ALPHABET))
+    yield TYPING_STEP, key_events("\r", pygame.K_RETURN)
+    for _ in range(answers):
+        for _ in range(rng.randint(1, 12)):
+            yield TYPING_STEP, key_events(rng.choice(ALPHABET))
+        yield TYPING_STEP, key_events("\r", pygame.K_RETURN)
+    # Thank you screen, in a few big steps, then back to Waiting Mode
+    steps = 4
+    for _ in range(steps):
+        yield (timings["thank_you_duration"] + 1) / steps, []
+
+
+def rss_kb():
+    """
+    Current resident set size in KiB (peak RSS where /proc is not available).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def load_kiosk(path):
+    spec = importlib.util.spec_from_file_location("kiosk", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class Soak:
+    def __init__(self, kiosk, sessions, every, seed):
+        self.kiosk = kiosk
+        self.sessions = sessions
+        self.every = every
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock()
+        content = load_content(kiosk.CONTENT_PATH, kiosk.DEFAULT_CONTENT)
+        self.answers = len(content.graph)
+        self.timings = content.timings
+        self.script = self._script()
+        self.session = 0
+        self.samples = []  # (session, traced bytes, rss KiB, snapshot)
+        self.started = time.perf_counter()
+
+    def _script(self):
+        for session in range(self.sessions):
+            self.session = session
+            if session % self.every==0:
+                self.sample(session)
+            yield from session_script(self.rng, self.answers, self.timings)
+        self.session = self.sessions
+        self.sample(self.sessions)
+
+    def sample(self, session):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        traced = tracemalloc.get_traced_memory()[0]
+        self.samples.append((session, traced, rss_kb(), snapshot))
+        print(f"  session {session:>6}: traced {traced / 1024:9.1f} KiB, RSS {self.samples[-1][2]:8d} KiB "
+              f"({time.perf_counter() - self.started:6.1f} s)")
+
+    def get_events(self, *args, **kwargs):
+        self._real_get()  # keep SDL's queue drained
+        try:
+            seconds, events = next(self.script)
+        except StopIteration:
+            return [pygame.event.Event(pygame.QUIT)]
+        self.clock.now += seconds
+        return events
+
+    def run(self):
+        self.kiosk.time = self.clock
+        self._real_get = pygame.event.get
+        pygame.event.get = self.get_events
+        try:
+            self.kiosk.main()
+        finally:
+            pygame.event.get = self._real_get
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory soak test for the kiosk")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--every", type=int, default=50, help="sessions between snapshots")
+    parser.add_argument("--max-growth-kb", type=float, default=4.0,
+                        help="allowed traced Python memory growth per session, in KiB")
+    parser.add_argument("--max-rss-growth-kb", type=float, default=64.0,
+                        help="allowed RSS growth per session, in KiB")
+    parser.add_argument("--top", type=int, default=10, help="growing allocation sites to list")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--kiosk", default=KIOSK_SCRIPT)
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, here)
+    with tempfile.TemporaryDirectory(prefix="kiosk-soak-") as run_dir:
+        for name in FILES:
+            shutil.copy(os.path.join(here, name), run_dir)
+        os.chdir(run_dir)
+
+        kiosk = load_kiosk(os.path.join(here, args.kiosk))
+        kiosk.CANVAS_SIZE = CANVAS_SIZE
+        # No frame waits on the real clock; the virtual clock decides what happens
+        kiosk.FRAME_RATE_POLICY = dict.fromkeys(kiosk.FRAME_RATE_POLICY, 1000)
+
+        print(f"Soaking {args.kiosk}: {args.sessions} sessions, snapshot every {args.every}")
+        tracemalloc.start()
+        soak = Soak(kiosk, args.sessions, args.every, args.seed)
+        soak.run()
+        tracemalloc.stop()
+        os.chdir(here)
+
+    # The first sample is taken before any session, while caches still warm up;
+    # growth is measured from the second one on
+    samples = soak.samples[1:] if len(soak.samples) > 2 else soak.samples
+    (first_session, first_traced, first_rss, first_snapshot) = samples[0]
+    (last_session, last_traced, last_rss, last_snapshot) = samples[-1]
+    sessions = max(1, last_session - first_session)
+    growth_kb = (last_traced - first_traced) / 1024 / sessions
+    rss_growth_kb = (last_rss - first_rss) / sessions
+
+    print(f"\nTop {args.top} growing allocation sites (sessions {first_session} -> {last_session}):")
+    for stat in last_snapshot.compare_to(first_snapshot, "lineno")[:args.top]:
+        if stat.size_diff <= 0:
+            break
+        frame = stat.traceback[0]
+        print(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d} blocks  "
+              f"{os.path.basename(frame.filename)}:{frame.lineno}")
+
+    print(f"\nPer session: traced {growth_kb:+.2f} KiB (limit {args.max_growth_kb}), "
+          f"RSS {rss_growth_kb:+.2f} KiB (limit {args.max_rss_growth_kb})")
+    failed = growth_kb > args.max_growth_kb or rss_growth_kb > args.max_rss_growth_kb
+    print("FAIL: memory grows per session" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__=="__main__":
+    main()
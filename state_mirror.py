@@ -0,0 +1,242 @@
+import argparse
+import glob
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+# ================= STATE MIRROR =================
+# Staff want to see what a visitor is typing and which question is up without
+# walking to the screen. The kiosk mirrors its state into a small shared memory
+# segment after every frame, and the operator console (this file's main(),
+# e.g. over ssh from the back room) reads it:
+#
+#   kiosk   - StateMirror.update(): one struct.pack_into per frame, a few
+#             microseconds; texts are only encoded when they change
+#   console - MirrorReader.read(): copies the fields out and never writes
+#
+# Writer and reader never lock each other out. The segment starts with a
+# sequence number (a seqlock): the kiosk makes it odd before writing the fields
+# and even again after. A reader that saw an odd number, or a different number
+# after copying, read a half-written frame and retries. The kiosk never waits.
+#
+# Each kiosk has its own segment, named after the station:
+#
+#   python state_mirror.py [--station station-1 ...] [--interval 0.25] [--once]
+
+SEGMENT_NAME = "kiosk-state"
+STALE_AFTER = 2.0  # seconds without an update before the console reattaches
+INPUT_BYTES = 240  # tail of the typed text, UTF-8
+QUESTION_BYTES = 160  # start of the question on screen, UTF-8
+
+_SEQ = struct.Struct("=Q")
+# pid, updated, frames, frame work ms, slowest frame work ms (last second), fps, rate state,
+# mode, question index, answers so far, question, input
+_FIELDS = struct.Struct(f"=I d Q f f f 8s 16s i H H {QUESTION_BYTES}s H {INPUT_BYTES}s")
+SIZE = _SEQ.size + _FIELDS.size
+
+MirrorState = namedtuple("MirrorState", "pid updated frames frame_ms slowest_ms fps rate mode "
+                                        "question_index answers question input")
+
+
+def segment_name(station=""):
+    return f"{SEGMENT_NAME}-{station}" if station else SEGMENT_NAME
+
+
+def _tail(text, size):
+    """
+    The last size bytes of text in UTF-8, cut at a character boundary.
+    """
+    data = text.encode("utf-8")
+    if len(data) <= size:
+        return data
+    return data[-size:].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _head(text, size):
+    return text.encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+class StateMirror:
+    """
+    Kiosk side: owns the segment and writes the state into it once per frame.
+    """
+
+    def __init__(self, name=SEGMENT_NAME):
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        except FileExistsError:
+            # Left behind by a kiosk that was killed; the layout is the same
+            self._shm = shared_memory.SharedMemory(name)
+            if self._shm.size < SIZE:
+                self._shm.close()
+                raise
+        self.name = name
+        self._buf = self._shm.buf
+        self._seq = 0
+        self._pid = os.getpid()
+        self.frames = 0
+        self._slowest = 0.0  # slowest frame of the last full second (work time, not the wait)
+        self._window_slowest = 0.0
+        self._window_end = 0.0
+        self._input = self._question = None
+        self._input_bytes = self._question_bytes = b""
+        _SEQ.pack_into(self._buf, 0, self._seq)
+
+    def update(self, mode, question_index, question, text, answers, frame_ms, fps, rate):
+        """
+        Mirrors one frame. Never blocks. frame_ms is what the frame's work took,
+        without the frame governor's wait.
+        """
+        self.frames += 1
+        now = time.time()
+        self._window_slowest = max(self._window_slowest, frame_ms)
+        if now >= self._window_end:
+            self._slowest = self._window_slowest
+            self._window_slowest = 0.0
+            self._window_end = now + 1.0
+        if text is not self._input:
+            self._input = text
+            self._input_bytes = _tail(text, INPUT_BYTES)
+        if question is not self._question:
+            self._question = question
+            self._question_bytes = _head(question, QUESTION_BYTES)
+
+        self._seq += 1  # odd: fields are being written
+        _SEQ.pack_into(self._buf, 0, self._seq)
+        _FIELDS.pack_into(self._buf, _SEQ.size, self._pid, now, self.frames, frame_ms, self._slowest, fps,
+                          rate.encode("ascii"), mode.encode("ascii"), question_index, min(answers, 0xFFFF),
+                          len(self._question_bytes), self._question_bytes,
+                          len(self._input_bytes), self._input_bytes)
+        self._seq += 1
+        _SEQ.pack_into(self._buf, 0, self._seq)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class MirrorReader:
+    """
+    Console side: a read-only view of one kiosk's segment.
+    """
+
+    def __init__(self, name=SEGMENT_NAME):
+        self.name = name
+        self._shm = None
+        self.retries = 0
+
+    def _attach(self):
+        self._shm = shared_memory.SharedMemory(self.name)
+        # Only the kiosk removes the segment: the console's exit must not
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+
+    def read(self, attempts=1000):
+        """
+        Returns a consistent MirrorState, or None while no kiosk is running.
+        """
+        if self._shm is None:
+            try:
+                self._attach()
+            except FileNotFoundError:
+                return None
+        buf = self._shm.buf
+        for _ in range(attempts):
+            before, = _SEQ.unpack_from(buf, 0)
+            if before & 1:
+                self.retries += 1
+                time.sleep(0)
+                continue
+            fields = _FIELDS.unpack_from(buf, _SEQ.size)
+            after, = _SEQ.unpack_from(buf, 0)
+            if before==after:
+                break
+            self.retries += 1
+        else:
+            return None
+        if before==0:
+            return None  # created, nothing written yet
+        pid, updated, frames, frame_ms, slowest, fps, rate, mode, index, answers, \
+            question_length, question, input_length, text = fields
+        state = MirrorState(pid, updated, frames, frame_ms, slowest, fps,
+                            rate.rstrip(b"\0").decode("ascii"), mode.rstrip(b"\0").decode("ascii"), index, answers,
+                            question[:question_length].decode("utf-8", "replace"),
+                            text[:input_length].decode("utf-8", "replace"))
+        if time.time() - state.updated > STALE_AFTER:
+            # The kiosk stopped, or was restarted with a new segment: look again next time
+            self.close()
+        return state
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def find_stations():
+    """
+    Station names of the segments on this machine (Linux keeps them in /dev/shm).
+    """
+    names = sorted(os.path.basename(path) for path in glob.glob(f"/dev/shm/{SEGMENT_NAME}*"))
+    return [name[len(SEGMENT_NAME) + 1:] for name in names] or [""]
+
+
+def console_lines(station, state, now, width):
+    label = station or "kiosk"
+    if state is None:
+        return [f"{label:<12} not running"]
+    age = max(0.0, now - state.updated)
+    status = "stale" if age > STALE_AFTER else state.mode
+    lines = [f"{label:<12} {status:<9} pid {state.pid:<7} frame {state.frames:<9} {state.fps:5.1f} fps "
+             f"({state.rate})  work {state.frame_ms:5.1f} ms, slowest {state.slowest_ms:5.1f} ms  "
+             f"updated {age:.1f} s ago"]
+    if state.mode=="question":
+        lines.append(f"  Q{state.question_index} ({state.answers} answered): {state.question}"[:width])
+    if state.mode in ("input_free", "question"):
+        text = state.input.replace("\n", " ")
+        lines.append(f"  > {text[-(width - 5):]}_")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Operator console: what every kiosk on this machine shows")
+    parser.add_argument("--station", action="append",
+                        help="station name (repeatable; default: every running station)")
+    parser.add_argument("--interval", type=float, default=0.25)
+    parser.add_argument("--once", action="store_true", help="print once and exit")
+    args = parser.parse_args()
+
+    readers = {}
+    try:
+        while True:
+            stations = args.station or find_stations()
+            for station in stations:
+                if station not in readers:
+                    readers[station] = MirrorReader(segment_name(station))
+            now = time.time()
+            width = os.get_terminal_size().columns if sys.stdout.isatty() else 100
+            lines = []
+            for station in stations:
+                lines.extend(console_lines(station, readers[station].read(), now, width))
+            if args.once:
+                print("\n".join(lines))
+                break
+            # Redraw in place: cursor home, clear the screen
+            sys.stdout.write("\x1b[H\x1b[J" + "\n".join(lines) + "\n")
+            sys.stdout.flush()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for reader in readers.values():
+            reader.close()
+
+
+if __name__=="__main__":
+    main()
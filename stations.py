@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Process
+from multiprocessing.connection import Client, Listener, wait
+
+# ================= MULTI-STATION LAUNCHER =================
+# Several screens in one room run from one host. The launcher starts one kiosk
+# process per station and one log writer process:
+#
+#   stations  - Final_5.1.py, each on its own display (or window), told through
+#               KIOSK_* environment variables which station it is
+#   writer    - the only process that touches collected_input.txt and
+#               sessions.jsonl; stations send their buffered log to it over a
+#               local socket (multiprocessing.connection) from an idle job, so
+#               there is no file locking between stations
+#
+# A station that exits is started again after RESTART_DELAY seconds, and so is
+# the writer, on the same address (stations keep their log queued while it is
+# away and send it once it is back). Every
+# --stats-every seconds the launcher prints per-station health (process state,
+# uptime, restarts) and throughput (what the writer received: sessions, lines,
+# bytes, and when the station last wrote).
+#
+# On one Linux box without screens, --dummy runs every station on SDL's dummy
+# video and audio drivers, and --demo drives them with scripted synthetic
+# visitors (the sessions of soak_memory.py) instead of a keyboard:
+#
+#   python stations.py --stations 3 --dummy --demo --duration 60
+#
+# Stations share the content file, text cache and answer index in the working
+# folder; SQLite and the cache's whole-file writes handle several processes.
+
+KIOSK_SCRIPT = "Final_5.1.py"
+RESTART_DELAY = 2.0  # seconds before a station that exited is started again
+STATS_EVERY = 10.0
+
+
+class LogWriter:
+    """
+    Serves the stations' log batches and appends them to the shared files.
+    Runs in its own process (serve()).
+    """
+
+    def __init__(self, address, authkey, text_path, sessions_path):
+        self.address = address
+        self.authkey = authkey
+        self.text_path = text_path
+        self.sessions_path = sessions_path
+        # Per station: [connections, batches, lines, sessions, bytes, time of last batch]
+        self.stats = {}
+
+    def serve(self):
+        listener = Listener(self.address, authkey=self.authkey)
+        connections = {}  # connection -> station name (None until it says hello)
+        lock = threading.Lock()
+
+        def accept():
+            while True:
+                try:
+                    connection = listener.accept()
+                except (OSError, EOFError):
+                    return  # closed on stop
+                except Exception as e:  # a client that failed the authentication
+                    print(f"Log writer rejected a connection: {e}")
+                    continue
+                with lock:
+                    connections[connection] = None
+
+        threading.Thread(target=accept, name="log writer accept", daemon=True).start()
+        with open(self.text_path, "a", encoding="utf-8") as text_file, \
+                open(self.sessions_path, "a", encoding="utf-8") as sessions_file:
+            running = True
+            while running:
+                with lock:
+                    ready = list(connections)
+                if not ready:
+                    time.sleep(0.2)
+                    continue
+                for connection in wait(ready, timeout=0.2):
+                    try:
+                        message = connection.recv()
+                    except (OSError, EOFError):
+                        with lock:
+                            del connections[connection]
+                        continue
+                    kind = message[0]
+                    if kind=="hello":
+                        with lock:
+                            connections[connection] = message[1]
+                        self._station(message[1])[0] += 1
+                    elif kind=="log":
+                        _, lines, sessions = message
+                        text = "".join(line + "\n" for line in lines)
+                        records = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in sessions)
+                        text_file.write(text)
+                        sessions_file.write(records)
+                        text_file.flush()
+                        sessions_file.flush()
+                        stats = self._station(connections.get(connection) or "?")
+                        stats[1] += 1
+                        stats[2] += len(lines)
+                        stats[3] += len(sessions)
+                        stats[4] += len(text.encode("utf-8")) + len(records.encode("utf-8"))
+                        stats[5] = time.time()
+                    elif kind=="stats":
+                        connection.send(self.stats)
+                    elif kind=="stop":
+                        running = False
+        listener.close()
+
+    def _station(self, name):
+        return self.stats.setdefault(name, [0, 0, 0, 0, 0, None])
+
+
+def run_writer(address, authkey, text_path, sessions_path):
+    LogWriter(address, authkey, text_path, sessions_path).serve()
+
+
+class Station:
+    """
+    One kiosk process and its health.
+    """
+
+    def __init__(self, name, command, env):
+        self.name = name
+        self.command = command
+        self.env = env
+        self.process = None
+        self.first_started = None
+        self.started = None
+        self.starts = 0
+        self.exit_codes = []
+        self._restart_at = None
+
+    def start(self, now):
+        self.process = subprocess.Popen(self.command, env=self.env)
+        if self.first_started is None:
+            self.first_started = now
+        self.started = now
+        self.starts += 1
+        self._restart_at = None
+
+    def poll(self, now):
+        """
+        Restarts the station RESTART_DELAY seconds after it exited.
+        """
+        if self.process is not None and self.process.poll() is not None:
+            self.exit_codes.append(self.process.returncode)
+            print(f"Station {self.name} exited with {self.process.returncode}, "
+                  f"restarting in {RESTART_DELAY:.0f} s")
+            self.process = None
+            self._restart_at = now + RESTART_DELAY
+        if self.process is None and self._restart_at is not None and now >= self._restart_at:
+            self.start(now)
+
+    @property
+    def state(self):
+        if self.process is not None:
+            return "running"
+        return "restarting" if self._restart_at is not None else "stopped"
+
+    def stop(self, timeout=10.0):
+        """
+        Asks the kiosk to quit (SDL turns SIGTERM into a QUIT event, so it
+        flushes its log), and kills it if it does not.
+        """
+        self._restart_at = None
+        if self.process is None:
+            return
+        self.process.terminate()
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.exit_codes.append(self.process.returncode)
+        self.process = None
+
+
+def station_env(name, index, address, authkey, args):
+    env = dict(os.environ)
+    env.update({
+        "KIOSK_STATION": name,
+        "KIOSK_LOG_ADDRESS": address,
+        "KIOSK_LOG_AUTHKEY": authkey.hex(),
+        "KIOSK_DISPLAY": str(args.displays[index % len(args.displays)] if args.displays else 0),
+    })
+    if args.windowed:
+        env["KIOSK_FULLSCREEN"] = "0"
+        env["SDL_VIDEO_WINDOW_POS"] = f"{40 + 60 * index},{40 + 60 * index}"
+    if args.dummy:
+        env["SDL_VIDEODRIVER"] = "dummy"
+        env["SDL_AUDIODRIVER"] = "dummy"
+    return env
+
+
+def start_writer(address, authkey, args):
+    # A writer that died leaves its socket file behind; the new one binds the same address
+    if os.path.exists(address):
+        os.remove(address)
+    writer = Process(target=run_writer, args=(address, authkey, args.output, args.sessions_file),
+                     name="log writer")
+    writer.start()
+    while not os.path.exists(address) and writer.is_alive():
+        time.sleep(0.05)
+    return writer
+
+
+def writer_stats(address, authkey):
+    """
+    The writer's per-station stats, or None if it cannot be reached.
+    """
+    try:
+        with Client(address, authkey=authkey) as connection:
+            connection.send(("stats",))
+            return connection.recv()
+    except (OSError, EOFError):
+        return None
+
+
+def stats_report(stations, stats, now, writer=None, writer_restarts=0):
+    """
+    Writer and station health and throughput. stats is None while the writer
+    cannot be reached; its counts start over when it is restarted.
+    """
+    lines = []
+    if writer is not None:
+        state = "running" if writer.is_alive() else f"exited with {writer.exitcode}"
+        reachable = "" if stats is not None else ", not reachable"
+        lines.append(f"log writer: {state}{reachable}, {writer_restarts} restarts")
+    stats = stats or {}
+    lines.append(f"{'station':<12} {'state':<10} {'pid':>7} {'uptime':>8} {'restarts':>8} "
+                 f"{'sessions':>8} {'lines':>7} {'KiB':>8} {'sess/min':>8} {'last write':>10}")
+    for station in stations:
+        connects, batches, text_lines, sessions, size, last = stats.get(station.name, [0, 0, 0, 0, 0, None])
+        uptime = now - station.started if station.process is not None else 0.0
+        running = now - station.first_started
+        per_minute = sessions / (running / 60) if running > 0 else 0.0
+        last_write = f"{now - last:.0f} s ago" if last else "never"
+        pid = station.process.pid if station.process is not None else "-"
+        lines.append(f"{station.name:<12} {station.state:<10} {pid:>7} {uptime:>7.0f}s {station.starts - 1:>8} "
+                     f"{sessions:>8} {text_lines:>7} {size / 1024:>8.1f} {per_minute:>8.1f} {last_write:>10}")
+    return "\n".join(lines)
+
+
+def demo_station(kiosk_path, seed):
+    """
+    Runs one kiosk with scripted synthetic visitors instead of a keyboard
+    (stations.py --demo starts every station this way).
+    """
+    from soak_memory import VirtualClock, load_kiosk, session_script
+    from content import load_content
+    import pygame
+
+    kiosk = load_kiosk(kiosk_path)
+    content = load_content(kiosk.CONTENT_PATH, kiosk.DEFAULT_CONTENT)
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    real_get = pygame.event.get
+
+    def script():
+        while True:
+            yield from session_script(rng, len(content.graph), content.timings)
+
+    steps = script()
+
+    def get_events(*args, **kwargs):
+        events = real_get()  # keeps the QUIT from SIGTERM
+        seconds, scripted = next(steps)
+        clock.now += seconds
+        return events + scripted
+
+    kiosk.time = clock
+    pygame.event.get = get_events
+    kiosk.main()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several kiosk stations with one shared log writer")
+    parser.add_argument("--stations", type=int, default=2)
+    parser.add_argument("--displays", type=lambda value: [int(d) for d in value.split(",")],
+                        help="display index per station, e.g. 0,1,2 (default: all on display 0)")
+    parser.add_argument("--windowed", action="store_true", help="windows instead of fullscreen")
+    parser.add_argument("--dummy", action="store_true", help="SDL dummy video and audio drivers")
+    parser.add_argument("--demo", action="store_true", help="drive the stations with synthetic visitors")
+    parser.add_argument("--duration", type=float, help="seconds to run (default: until Ctrl+C)")
+    parser.add_argument("--stats-every", type=float, default=STATS_EVERY)
+    parser.add_argument("--kiosk", default=KIOSK_SCRIPT)
+    parser.add_argument("--output", default="collected_input.txt")
+    parser.add_argument("--sessions-file", default="sessions.jsonl")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    kiosk_path = os.path.join(here, args.kiosk)
+    socket_dir = tempfile.mkdtemp(prefix="kiosk-stations-")
+    address = os.path.join(socket_dir, "log.sock")
+    authkey = os.urandom(16)
+
+    writer = start_writer(address, authkey, args)
+    writer_restarts = 0
+
+    stations = []
+    for index in range(args.stations):
+        name = f"station-{index + 1}"
+        if args.demo:
+            command = [sys.executable, os.path.abspath(__file__), "--demo-station", kiosk_path, str(index)]
+        else:
+            command = [sys.executable, kiosk_path]
+        stations.append(Station(name, command, station_env(name, index, address, authkey, args)))
+
+    start = time.time()
+    for station in stations:
+        station.start(start)
+    next_stats = start + args.stats_every
+    try:
+        while args.duration is None or time.time() - start < args.duration:
+            now = time.time()
+            for station in stations:
+                station.poll(now)
+            if not writer.is_alive():
+                print(f"Log writer exited with {writer.exitcode}, restarting")
+                writer = start_writer(address, authkey, args)
+                writer_restarts += 1
+            if now >= next_stats:
+                print(stats_report(stations, writer_stats(address, authkey), now, writer, writer_restarts))
+                next_stats = now + args.stats_every
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for station in stations:
+            station.stop()
+        print(stats_report(stations, writer_stats(address, authkey), time.time(), writer, writer_restarts))
+        try:
+            with Client(address, authkey=authkey) as connection:
+                connection.send(("stop",))
+        except (OSError, EOFError):
+            pass  # the writer is gone already
+        writer.join(5)
+        if writer.is_alive():
+            writer.terminate()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+if __name__=="__main__":
+    if len(sys.argv)==4 and sys.argv[1]=="--demo-station":
+        demo_station(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,110 @@
+import hashlib
+import mmap
+import os
+import struct
+
+import pygame
+
+# ================= DISK SURFACE CACHE =================
+# Pre-rendered text surfaces are kept on disk as raw RGBA so a cold start can
+# map them back in instead of rasterizing every sentence and question again.
+#
+# File layout: <sha1 key>.rgba = 8 byte header (width, height as little endian
+# uint32) followed by width * height * 4 bytes of RGBA pixels.
+#
+# The key hashes the font file's contents, the font size, the color, the text
+# and the screen resolution, so a new font or changed copy simply misses and the
+# stale files are pruned once they are no longer in use.
+
+HEADER = struct.Struct("<II")
+
+
+class DiskSurfaceCache:
+    """
+    Raw RGBA surface store keyed by font file hash, size, color, text and resolution.
+    """
+
+    def __init__(self, cache_dir, resolution):
+        self.cache_dir = cache_dir
+        self.resolution = tuple(resolution)
+        self._font_hashes = {}
+        self.loads = 0
+        self.stores = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def font_hash(self, font_path):
+        digest = self._font_hashes.get(font_path)
+        if digest is None:
+            with open(font_path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            self._font_hashes[font_path] = digest
+        return digest
+
+    def key(self, font_path, size, color, text):
+        parts = (self.font_hash(font_path), str(size), ",".join(map(str, color)), text,
+                 "x".join(map(str, self.resolution)))
+        return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".rgba")
+
+    def load(self, key):
+        """
+        Returns the cached surface for key, or None if it is not on disk.
+        """
+        try:
+            f = open(self._path(key), "rb")
+        except OSError:
+            return None
+        with f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return None  # empty file
+            with mapped:
+                if len(mapped) < HEADER.size:
+                    return None
+                width, height = HEADER.unpack_from(mapped)
+                if len(mapped)!=HEADER.size + width * height * 4:
+                    return None
+                # frombuffer reads the mapped pages in place; copy into an owned surface
+                # and release the view before the map is closed
+                pixels = memoryview(mapped)[HEADER.size:]
+                mapped_surface = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+                if pygame.display.get_surface() is not None:
+                    surface = mapped_surface.convert_alpha()
+                else:
+                    surface = mapped_surface.copy()
+                del mapped_surface
+                pixels.release()
+        self.loads += 1
+        return surface
+
+    def store(self, key, surface):
+        """
+        Writes surface to disk. The file is written under a temporary name and
+        renamed, so a crash never leaves a truncated entry behind.
+        """
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(HEADER.pack(*surface.get_size()))
+                f.write(pygame.image.tobytes(surface, "RGBA"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write text cache entry {path}: {e}")
+            return
+        self.stores += 1
+
+    def prune(self, keep):
+        """
+        Deletes every cached file whose key is not in keep.
+        """
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext==".rgba" and key not in keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
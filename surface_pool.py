@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+import pygame
+
+# ================= SURFACE POOL =================
+# Surfaces that are needed over and over with the same size (cross-fade frames,
+# scratch surfaces for composing text) are borrowed from the pool and given
+# back instead of being allocated and dropped. Free surfaces are kept per
+# (size, flags); the number kept per key is capped so the pool cannot grow
+# without bound.
+#
+# The pool also counts allocations per frame: every surface it has to create,
+# plus the ones callers report with track() (e.g. font.render, which allocates
+# inside SDL_ttf). end_frame() closes a frame, so a run can show that steady
+# frames allocate nothing.
+
+MAX_FREE_PER_KEY = 16
+
+
+class SurfacePool:
+    """
+    Free lists of surfaces keyed by size and flags, plus allocation counters.
+    Surfaces without SRCALPHA get the pixel format of like (e.g. the screen).
+    """
+
+    def __init__(self, like=None, max_free=MAX_FREE_PER_KEY):
+        self.like = like
+        self.max_free = max_free
+        self._free = defaultdict(list)
+        self.reused = 0
+        self.allocations = 0
+        self.frame_allocations = 0
+        # Per frame-state name: [frames, frames that allocated, allocations, most in one frame]
+        self.frames = defaultdict(lambda: [0, 0, 0, 0])
+
+    def acquire(self, size, flags=0):
+        """
+        Returns a surface of size; its contents are undefined.
+        """
+        key = (tuple(size), flags)
+        free = self._free.get(key)
+        if free:
+            self.reused += 1
+            return free.pop()
+        self.track()
+        if flags & pygame.SRCALPHA or self.like is None:
+            return pygame.Surface(size, flags)
+        return pygame.Surface(size, flags, self.like)
+
+    def release(self, surface):
+        """
+        Gives surface back to the pool. It must not be used by the caller afterwards.
+        """
+        free = self._free[(surface.get_size(), surface.get_flags() & pygame.SRCALPHA)]
+        if len(free) < self.max_free:
+            free.append(surface)
+
+    def track(self, count=1):
+        """
+        Counts surfaces allocated outside the pool.
+        """
+        self.allocations += count
+        self.frame_allocations += count
+
+    def end_frame(self, state):
+        """
+        Closes the current frame's allocation count under state (e.g. the mode)
+        and returns it.
+        """
+        count = self.frame_allocations
+        stats = self.frames[state]
+        stats[0] += 1
+        if count:
+            stats[1] += 1
+            stats[2] += count
+            stats[3] = max(stats[3], count)
+        self.frame_allocations = 0
+        return count
+
+    def report(self):
+        lines = [f"Surface pool: {self.allocations} surfaces allocated, {self.reused} reused"]
+        for state, (frames, allocating, allocations, most) in self.frames.items():
+            lines.append(f"  {state:<10} {frames:>7} frames, {allocating} allocated "
+                         f"({allocations} surfaces, at most {most} in one frame)")
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+import pygame
+
+try:
+    import pygame.freetype as freetype
+except ImportError:  # some pygame builds come without freetype; the font backend still works
+    freetype = None
+
+from font_fallback import MEMO_LIMIT, FontChain
+from glyph_atlas import AtlasChain
+
+# ================= TEXT BACKENDS =================
+# Typed text changes on every key press, so it cannot come from the TextCache.
+# With pygame.font every draw rasterizes into a freshly allocated Surface that is
+# blitted once and thrown away.
+#
+# The freetype backend rasterizes straight onto the target surface with
+# Font.render_to, so drawing the input line allocates no intermediate surface.
+# Layout is done from glyph advances (get_metrics, memoized per character),
+# which never rasterizes either.
+#
+# The atlas backend (glyph_atlas.py) goes further and composes strings from a
+# sheet of glyphs rasterized once, so typing does not rasterize at all.
+#
+# All backends are font fallback chains with the same interface:
+#   size(text), get_rect(text, **position), draw(target, text, color, **position)
+# and are picked by name with make_text_backend().
+
+HAVE_FREETYPE = freetype is not None
+
+
+class FreetypeChain(FontChain):
+    """
+    A FontChain drawn with pygame.freetype.Font.render_to.
+    """
+
+    name = "freetype"
+
+    def __init__(self, paths, size, pool=None):
+        if not HAVE_FREETYPE:
+            raise RuntimeError("the freetype text backend needs pygame.freetype")
+        if not freetype.get_init():
+            freetype.init()
+        self._advances = {}
+        super().__init__(paths, size, pool)
+
+    def open_font(self, path, size):
+        font = freetype.Font(path, size)
+        font.origin = True  # render_to positions are baseline origins, like a pen
+        font.antialiased = True
+        return font
+
+    def line_metrics(self):
+        ascent = max(font.get_sized_ascender() for font in self.fonts)
+        return ascent, ascent + max(-font.get_sized_descender() for font in self.fonts)
+
+    def advance(self, char):
+        width = self._advances.get(char)
+        if width is None:
+            metrics = self.fonts[self.font_index(char)].get_metrics(char)[0]
+            if len(self._advances) >= MEMO_LIMIT:
+                self._advances.clear()
+            width = self._advances[char] = int(metrics[4]) if metrics is not None else 0
+        return width
+
+    def size(self, text):
+        return sum(self.advance(char) for char in text), self.height
+
+    def render(self, text, antialias, color):
+        # Only for callers that need a Surface; the kiosk draws with draw()
+        self._track(1)
+        surface = pygame.Surface(self.size(text), pygame.SRCALPHA)
+        self.draw(surface, text, color, antialias, topleft=(0, 0))
+        return surface
+
+    def draw(self, target, text, color, antialias=True, **position):
+        rect = self.get_rect(text, **position)
+        x, baseline = rect.left, rect.top + self.ascent
+        for index, part in self.runs(text):
+            font = self.fonts[index]
+            font.antialiased = antialias
+            font.render_to(target, (x, baseline), part, color)
+            x += sum(self.advance(char) for char in part)
+        return rect
+
+
+TEXT_BACKENDS = {
+    FontChain.name: FontChain,
+    FreetypeChain.name: FreetypeChain,
+    AtlasChain.name: AtlasChain,
+}
+
+
+def make_text_backend(name, paths, size, pool=None):
+    """
+    Returns the text backend called name for the font chain paths at size.
+    Surfaces it allocates are counted in pool (a SurfacePool), if given.
+    """
+    try:
+        backend = TEXT_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown text backend '{name}' (use one of {', '.join(TEXT_BACKENDS)})") from None
+    return backend(paths, size, pool=pool)
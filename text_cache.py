@@ -0,0 +1,94 @@
+# ================= TEXT SURFACE CACHE =================
+# Static strings (waiting sentences, questions, thank-you lines) used to be
+# rendered with font.render() on every frame. The cache rasterizes each string
+# once per font and color and hands back the same Surface afterwards.
+#
+# With a DiskSurfaceCache attached, fonts registered with their file path and
+# size are also persisted to disk, so the next boot loads the surfaces instead
+# of rasterizing them.
+
+
+class TextCache:
+    """
+    Rendered text surfaces keyed by (font name, text, color). Fonts are
+    registered once by name so the key stays stable across content reloads.
+    """
+
+    def __init__(self, antialias=True, disk_cache=None, pool=None):
+        self.antialias = antialias
+        self.disk_cache = disk_cache
+        self.pool = pool  # SurfacePool that counts the surfaces created on misses
+        self.fonts = {}
+        self._font_files = {}
+        self._surfaces = {}
+        self._disk_keys = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add_font(self, name, font, path=None, size=None):
+        """
+        Registers font under name. Pass the font's file path and size to let
+        its surfaces be persisted in the disk cache.
+        """
+        self.fonts[name] = font
+        if path is not None and size is not None:
+            self._font_files[name] = (path, size)
+
+    def render(self, font_name, text, color):
+        """
+        Returns the cached surface for text, rasterizing it on first use.
+        """
+        key = (font_name, text, color)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            if self.pool is not None:
+                self.pool.track()
+            surface = self._load_or_render(key)
+            self._surfaces[key] = surface
+        else:
+            self.hits += 1
+        return surface
+
+    def _load_or_render(self, key):
+        font_name, text, color = key
+        font_file = self._font_files.get(font_name)
+        if self.disk_cache is None or font_file is None:
+            return self.fonts[font_name].render(text, self.antialias, color)
+
+        disk_key = self.disk_cache.key(font_file[0], font_file[1], color, text)
+        self._disk_keys[key] = disk_key
+        surface = self.disk_cache.load(disk_key)
+        if surface is None:
+            surface = self.fonts[font_name].render(text, self.antialias, color)
+            self.disk_cache.store(disk_key, surface)
+        return surface
+
+    def warm(self, font_name, texts, color):
+        """
+        Rasterizes every string in texts that is not cached yet.
+        """
+        for text in texts:
+            self.render(font_name, text, color)
+
+    def retain(self, texts):
+        """
+        Drops every cached surface whose text is not in texts. Strings that are
+        still in use keep their surfaces, so a content reload only rasterizes
+        what actually changed.
+        """
+        texts = set(texts)
+        for key in [k for k in self._surfaces if k[1] not in texts]:
+            del self._surfaces[key]
+            self._disk_keys.pop(key, None)
+
+    def prune_disk(self):
+        """
+        Removes disk cache entries that are no longer held in memory, e.g.
+        strings from an older content file or surfaces of a replaced font.
+        """
+        if self.disk_cache is not None:
+            self.disk_cache.prune(set(self._disk_keys.values()))
+
+    def __len__(self):
+        return len(self._surfaces)
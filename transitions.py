@@ -0,0 +1,142 @@
+from collections import OrderedDict
+
+import pygame
+
+# ================= CROSS-FADE TRANSITIONS =================
+# Waiting Mode cross-fades from one sentence to the next. Setting a surface
+# alpha and re-rendering both sentences on every frame of the fade would double
+# the frame cost, so the fade frames are composed ahead of time instead:
+#
+#   1. prepare() is called as soon as the next sentence is known, long before
+#      the fade starts. It does no drawing.
+#   2. build() is called once per frame and composes at most `budget` fade
+#      frames (and never runs past budget_ms), so the extra work per frame has
+#      a hard cap.
+#   3. Once all frames exist, start() begins the fade; current() then picks the
+#      pre-composed frame for the clock time, a single opaque blit per frame.
+#
+# Frames are kept per sentence pair in a small LRU so a pair that comes up
+# again fades without composing anything. With a SurfacePool and a fixed
+# frame_size, every pair's frames have the same size, so the frames evicted
+# from the LRU are exactly what the next pair borrows from the pool.
+
+
+class CrossFade:
+    """
+    Pre-composed cross-fade between two text surfaces drawn at the same center.
+    """
+
+    def __init__(self, bg_color, steps=12, duration=0.6, budget=2, budget_ms=4.0, cached_pairs=4, pool=None,
+                 frame_size=None):
+        self.bg_color = bg_color
+        self.pool = pool
+        self.frame_size = frame_size  # minimum frame size, e.g. (screen width, line height)
+        self.steps = steps
+        self.duration = duration
+        self.budget = budget
+        self.budget_ms = budget_ms
+        self.cached_pairs = cached_pairs
+        self._pairs = OrderedDict()
+        self._key = None
+        self._old = None
+        self._new = None
+        self._center = None
+        self._rect = None
+        self._frames = []
+        self._start_time = None
+        self.frames_built = 0
+
+    def prepare(self, key, old, new, center):
+        """
+        Sets up a fade from surface old to surface new. key identifies the pair
+        (e.g. the two sentences) for the frame cache.
+        """
+        self.cancel()
+        self._key = key
+        self._old = old
+        self._new = new
+        self._center = center
+        old_rect = old.get_rect(center=center)
+        self._rect = old_rect.union(new.get_rect(center=center))
+        if self.frame_size is not None:
+            rect = pygame.Rect((0, 0), (max(self._rect.width, self.frame_size[0]),
+                                        max(self._rect.height, self.frame_size[1])))
+            rect.center = self._rect.center
+            self._rect = rect
+        frames = self._pairs.get(key)
+        if frames is not None and frames[0].get_size()==self._rect.size:
+            self._pairs.move_to_end(key)
+            self._frames = frames
+        else:
+            self._frames = []
+
+    def build(self):
+        """
+        Composes up to budget missing frames. Returns the number of frames composed.
+        """
+        if self._key is None or self.ready:
+            return 0
+        deadline = pygame.time.get_ticks() + self.budget_ms
+        built = 0
+        while not self.ready and built < self.budget:
+            self._frames.append(self._compose(len(self._frames) + 1))
+            built += 1
+            if pygame.time.get_ticks() >= deadline:
+                break
+        self.frames_built += built
+        if self.ready:
+            replaced = self._pairs.get(self._key)
+            if replaced is not None:
+                self._release(replaced)
+            self._pairs[self._key] = self._frames
+            self._pairs.move_to_end(self._key)
+            while len(self._pairs) > self.cached_pairs:
+                self._release(self._pairs.popitem(last=False)[1])
+        return built
+
+    def _compose(self, step):
+        # Step 1..steps; the last frame is the new surface fully opaque
+        t = step / self.steps
+        if self.pool is not None:
+            frame = self.pool.acquire(self._rect.size)
+        else:
+            frame = pygame.Surface(self._rect.size).convert()
+        frame.fill(self.bg_color)
+        for surface, alpha in ((self._old, 1 - t), (self._new, t)):
+            surface.set_alpha(round(alpha * 255))
+            frame.blit(surface, surface.get_rect(center=self._center).move(-self._rect.x, -self._rect.y))
+            surface.set_alpha(None)
+        return frame
+
+    def _release(self, frames):
+        if self.pool is not None:
+            for frame in frames:
+                self.pool.release(frame)
+
+    @property
+    def ready(self):
+        return len(self._frames)==self.steps
+
+    @property
+    def running(self):
+        return self._start_time is not None
+
+    def start(self, now):
+        self._start_time = now
+
+    def cancel(self):
+        if self._frames and self._pairs.get(self._key) is not self._frames:
+            self._release(self._frames)  # partly built frames that never made it into the cache
+        self._key = None
+        self._frames = []
+        self._start_time = None
+
+    def current(self, now):
+        """
+        Returns the (frame, rect) to draw at time now, or None once the fade is over.
+        """
+        progress = (now - self._start_time) / self.duration
+        if progress >= 1:
+            self.cancel()
+            return None
+        return self._frames[min(int(progress * self.steps), self.steps - 1)], self._rect
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:  # the kiosk records keystrokes without NumPy; the metrics need it
+    np = None
+
+# ================= TYPING DYNAMICS =================
+# How a visitor typed says as much as what they typed. The kiosk records when
+# every character of the free input and of every answer arrived (KeystrokeLog),
+# and stores the times with the session in sessions.jsonl:
+#
+#   "keystrokes": [{"start": 0, "keys": [412, 530, ...], "enter": 2210}, ...]
+#
+# one entry per free input / answer, in milliseconds since the session started:
+# when the entry was opened, when each character arrived, and when Enter was
+# pressed (null if it timed out). pygame events carry no time of their own, so
+# keys are stamped with the frame that drained them: at the typing frame rate
+# that is a resolution of about 17 ms.
+#
+# session_dynamics() turns them into metrics per entry, in one NumPy pass over
+# all keys of the session (no loop per entry or per key):
+#
+#   intervals  - 10th / 50th / 90th percentile of the time between keys
+#   bursts     - runs of keys without a gap of BURST_GAP or more
+#   pauses     - gaps of PAUSE or more, and the longest gap
+#   wpm        - words (5 characters) per minute from the first to the last key
+#   hesitation - time between the last key (or the question, if nothing was
+#                typed) and Enter
+#
+# The kiosk computes them as an idle job when a session ends, before the record
+# is written. For older records, run the stage in batch over the archive:
+#
+#   python typing_dynamics.py [sessions.jsonl] [-o output.jsonl] [--force]
+
+BURST_GAP = 0.5  # seconds between keys that end a burst
+PAUSE = 2.0  # seconds between keys that count as a pause
+PERCENTILES = (10, 50, 90)
+CHARS_PER_WORD = 5
+
+
+class KeystrokeLog:
+    """
+    Key times of the current session, per entry (the free input, then each answer).
+    """
+
+    def __init__(self):
+        self.start(0.0)
+
+    def start(self, now):
+        """
+        Starts a session; its first entry (the free input) opens at now.
+        """
+        self._session_start = now
+        self.entries = []
+        self._open = {"start": 0, "keys": [], "enter": None}
+
+    def state(self):
+        """
+        The log as JSON-serializable data, for the session journal (see watchdog.py).
+        """
+        return {"start": self._session_start, "entries": self.entries, "open": self._open}
+
+    def restore(self, state):
+        self._session_start = state["start"]
+        self.entries = state["entries"]
+        self._open = state["open"]
+
+    def _ms(self, now):
+        return round((now - self._session_start) * 1000)
+
+    def add(self, count, now):
+        """
+        Records count characters typed at now.
+        """
+        if count:
+            self._open["keys"].extend([self._ms(now)] * count)
+
+    def next_entry(self, now, enter):
+        """
+        Closes the open entry (enter: it was ended with Enter rather than by a
+        timeout) and opens the next one.
+        """
+        if enter:
+            self._open["enter"] = self._ms(now)
+        self.entries.append(self._open)
+        self._open = {"start": self._ms(now), "keys": [], "enter": None}
+
+
+def session_dynamics(keystrokes):
+    """
+    Returns the metrics of every entry of a session's "keystrokes" list, as a
+    list of dicts (times in seconds). Needs NumPy.
+    """
+    n = len(keystrokes)
+    if n==0:
+        return []
+    counts = np.fromiter((len(entry["keys"]) for entry in keystrokes), dtype=np.int64, count=n)
+    times = np.fromiter((key for entry in keystrokes for key in entry["keys"]),
+                        dtype=np.float64, count=int(counts.sum())) / 1000
+    starts = np.fromiter((entry["start"] for entry in keystrokes), dtype=np.float64, count=n) / 1000
+    enters = np.fromiter((np.nan if entry.get("enter") is None else entry["enter"] for entry in keystrokes),
+                         dtype=np.float64, count=n) / 1000
+    ids = np.repeat(np.arange(n), counts)
+
+    # Intervals between consecutive keys of the same entry
+    same = ids[1:]==ids[:-1]
+    intervals = np.diff(times)[same]
+    interval_ids = ids[1:][same]
+    interval_counts = np.bincount(interval_ids, minlength=n)
+
+    # Percentiles per entry: sort by entry, then by interval, and interpolate
+    # inside each entry's slice. Entries without intervals point at the NaN
+    # appended at the end.
+    order = np.lexsort((intervals, interval_ids))
+    ordered = np.append(intervals[order], np.nan)
+    has_intervals = interval_counts > 0
+    first = np.where(has_intervals, np.cumsum(interval_counts) - interval_counts, len(intervals))
+    span = np.maximum(interval_counts - 1, 0)
+    percentiles = {}
+    for q in PERCENTILES:
+        position = (q / 100) * span
+        low = np.floor(position).astype(np.int64)
+        fraction = position - low
+        high = np.minimum(low + 1, span)
+        percentiles[q] = ordered[first + low] * (1 - fraction) + ordered[first + high] * fraction
+    longest = ordered[first + span]
+
+    bursts = np.bincount(interval_ids[intervals >= BURST_GAP], minlength=n) + (counts > 0)
+    pauses = np.bincount(interval_ids[intervals >= PAUSE], minlength=n)
+
+    # First and last key of every entry (keys are in time order within an entry)
+    padded = np.append(times, np.nan)
+    has_keys = counts > 0
+    key_first = np.where(has_keys, np.cumsum(counts) - counts, len(times))
+    first_key = padded[key_first]
+    last_key = padded[key_first + np.maximum(counts - 1, 0)]
+    typing = last_key - first_key
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wpm = np.where(typing > 0, counts / CHARS_PER_WORD / (typing / 60), np.nan)
+    hesitation = enters - np.where(has_keys, last_key, starts)
+    reaction = first_key - starts
+
+    columns = {
+        "keys": counts,
+        "reaction": reaction,
+        "typing": typing,
+        "interval_p10": percentiles[10],
+        "interval_p50": percentiles[50],
+        "interval_p90": percentiles[90],
+        "longest_gap": longest,
+        "bursts": bursts,
+        "keys_per_burst": np.where(bursts > 0, counts / np.maximum(bursts, 1), np.nan),
+        "pauses": pauses,
+        "wpm": wpm,
+        "hesitation": hesitation,
+    }
+    rows = [dict() for _ in range(n)]
+    for name, column in columns.items():
+        for row, value in zip(rows, column.tolist()):
+            if isinstance(value, float):
+                # JSON has no NaN: metrics that do not apply are null
+                value = None if value!=value else round(value, 3)
+            row[name] = value
+    return rows
+
+
+def add_dynamics(record):
+    """
+    Adds the "dynamics" of a session record in place, if it has keystrokes.
+    """
+    if np is not None and record.get("keystrokes") is not None:
+        record["dynamics"] = session_dynamics(record["keystrokes"])
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Typing dynamics for every session in a session log")
+    parser.add_argument("path", nargs="?", default="sessions.jsonl")
+    parser.add_argument("-o", "--output", help="where to write the records (default: update the log in place)")
+    parser.add_argument("--force", action="store_true", help="recompute sessions that already have dynamics")
+    args = parser.parse_args()
+    if np is None:
+        sys.exit("typing_dynamics.py needs NumPy")
+
+    output = args.output or args.path
+    folder = os.path.dirname(os.path.abspath(output))
+    computed = skipped = 0
+    # Streams record by record into a temporary file next to the output, then replaces it
+    with open(args.path, encoding="utf-8") as source, \
+            tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=folder, delete=False) as target:
+        for line in source:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "keystrokes" in record and (args.force or "dynamics" not in record):
+                add_dynamics(record)
+                computed += 1
+                line = json.dumps(record, ensure_ascii=False) + "\n"
+            else:
+                skipped += 1
+            target.write(line if line.endswith("\n") else line + "\n")
+    os.replace(target.name, output)
+    print(f"{computed} sessions computed, {skipped} unchanged -> {output}")
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# ================= WATCHDOG =================
+# If the kiosk crashes or hangs, the screen stays black until someone notices.
+# The watchdog runs the kiosk as a child process and watches a heartbeat the
+# kiosk's main loop writes:
+#
+#   Heartbeat      - kiosk side: after every frame, at most every interval
+#                    seconds, writes "pid frames mode" into a small file
+#   SessionJournal - kiosk side: the session in progress (mode, texts so far,
+#                    answers, layout, keystrokes), saved whenever it changes so
+#                    a restarted kiosk can pick the visitor up where they were
+#   Supervisor     - restarts the kiosk when it exits with an error, and kills
+#                    (SIGKILL; a hung loop never reads SDL's QUIT) and restarts
+#                    it when the frame count stops moving for hang_timeout seconds
+#
+# Every failure is timed from the moment it started (exit, or the last frame
+# that made progress) to the first frame of the new process, and report() shows
+# the mean time to recovery. The new process starts in the same folder, so it
+# loads the rasterized text from the text cache on disk instead of redoing it.
+#
+#   python watchdog.py [--hang-timeout 5] [--kiosk Final_5.1.py] [--demo]
+
+KIOSK_SCRIPT = "Final_5.1.py"
+HEARTBEAT_FILE = "heartbeat"
+HANG_TIMEOUT = 5.0  # seconds without a new frame before the kiosk counts as hung
+STARTUP_TIMEOUT = 30.0  # seconds a new process may take to show its first frame
+POLL_INTERVAL = 0.2
+RESTART_DELAY = 0.5  # seconds between giving up on a process and starting the next one
+
+
+class Heartbeat:
+    """
+    Kiosk side: a fixed-width record of the frame count, rewritten in place.
+    """
+
+    SIZE = 64
+
+    def __init__(self, path, interval=0.25):
+        self.path = path
+        self.interval = interval
+        self.frames = 0
+        self._last = 0.0
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    def beat(self, mode):
+        """
+        Counts a frame. Call once per frame from the main loop.
+        """
+        self.frames += 1
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            record = f"{os.getpid()} {self.frames} {mode}".ljust(self.SIZE - 1) + "\n"
+            os.pwrite(self._fd, record.encode("ascii", "replace"), 0)
+
+    def close(self):
+        os.close(self._fd)
+
+
+def read_heartbeat(path):
+    """
+    Returns (pid, frames, mode) from a heartbeat file, or None.
+    """
+    try:
+        with open(path, "rb") as f:
+            pid, frames, mode = f.read(Heartbeat.SIZE).split()
+        return int(pid), int(frames), mode.decode("ascii")
+    except (OSError, ValueError):
+        return None
+
+
+class SessionJournal:
+    """
+    Kiosk side: the session in progress, written atomically whenever it
+    changes (at most every interval seconds) and removed when it ends.
+    """
+
+    def __init__(self, path, interval=0.5, max_age=60.0):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self._key = None
+        self._saved = 0.0
+        self.saves = 0
+
+    def changed(self, key):
+        """
+        True when key (a cheap summary of the session state) differs from the
+        last saved one and the interval has passed; the caller then saves.
+        """
+        now = time.monotonic()
+        if key==self._key or now - self._saved < self.interval:
+            return False
+        self._key = key
+        self._saved = now
+        return True
+
+    def save(self, state):
+        if self._key is None:
+            return  # the session ended after this save was queued
+        state = dict(state, saved_at=time.time())
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(temporary, self.path)
+        self.saves += 1
+
+    def load(self):
+        """
+        Returns the saved session if there is one younger than max_age seconds.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - state.get("saved_at", 0) > self.max_age:
+            return None
+        return state
+
+    def clear(self):
+        self._key = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class Supervisor:
+    """
+    Runs the kiosk command, restarts it when it crashes or hangs, and times recoveries.
+    """
+
+    def __init__(self, command, heartbeat_path=HEARTBEAT_FILE, hang_timeout=HANG_TIMEOUT,
+                 startup_timeout=STARTUP_TIMEOUT, env=None):
+        self.command = command
+        self.heartbeat_path = os.path.abspath(heartbeat_path)
+        self.hang_timeout = hang_timeout
+        self.startup_timeout = startup_timeout
+        self.env = dict(env or os.environ, KIOSK_HEARTBEAT=self.heartbeat_path)
+        self.process = None
+        self._started = None
+        self._frames = None  # frame count of the last heartbeat, None before the first frame
+        self._progress = None  # when the frame count last moved
+        self.crashes = 0
+        self.hangs = 0
+        # Per recovery: (seconds down, seconds from detection to first frame)
+        self.recoveries = []
+        self.first_frames = []  # seconds from process start to its first frame
+        self._failed_at = None  # when the current outage began
+        self._detected_at = None
+
+    def start(self):
+        try:
+            os.remove(self.heartbeat_path)
+        except OSError:
+            pass
+        self.process = subprocess.Popen(self.command, env=self.env)
+        self._started = time.monotonic()
+        self._frames = None
+        self._progress = self._started
+
+    def _fail(self, kind, began):
+        now = time.monotonic()
+        if kind=="hang":
+            self.hangs += 1
+            self.process.kill()
+        else:
+            self.crashes += 1
+        self.process.wait()
+        print(f"Watchdog: kiosk {kind} (exit {self.process.returncode}), restarting")
+        self._failed_at = began
+        self._detected_at = now
+        time.sleep(RESTART_DELAY)
+        self.start()
+
+    def poll(self):
+        """
+        Checks the kiosk once. Returns False when it quit on its own (exit code 0).
+        """
+        now = time.monotonic()
+        code = self.process.poll()
+        if code is not None:
+            if code==0:
+                return False
+            self._fail("crash", now)
+            return True
+
+        beat = read_heartbeat(self.heartbeat_path)
+        frames = beat[1] if beat is not None and beat[0]==self.process.pid else None
+        if frames is not None and frames!=self._frames:
+            if self._frames is None:
+                self.first_frames.append(now - self._started)
+                if self._failed_at is not None:
+                    self.recoveries.append((now - self._failed_at, now - self._detected_at))
+                    print(f"Watchdog: recovered in {now - self._failed_at:.1f} s")
+                    self._failed_at = None
+            self._frames = frames
+            self._progress = now
+        elif self._frames is None:
+            if now - self._started > self.startup_timeout:
+                self._fail("hang", self._started)
+        elif now - self._progress > self.hang_timeout:
+            self._fail("hang", self._progress)
+        return True
+
+    def run(self):
+        self.start()
+        try:
+            while self.poll():
+                time.sleep(POLL_INTERVAL)
+        finally:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(10)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+
+    def report(self):
+        lines = [f"Watchdog: {self.crashes} crashes, {self.hangs} hangs, {len(self.recoveries)} recoveries"]
+        if self.recoveries:
+            down = [seconds for seconds, _ in self.recoveries]
+            restart = [seconds for _, seconds in self.recoveries]
+            lines.append(f"  mean time to recovery {sum(down) / len(down):.2f} s (longest {max(down):.2f} s), "
+                         f"of which restart to first frame {sum(restart) / len(restart):.2f} s")
+        if self.first_frames:
+            lines.append(f"  first frame after start: first {self.first_frames[0]:.2f} s, "
+                         f"restarts {sum(self.first_frames[1:]) / max(1, len(self.first_frames) - 1):.2f} s")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the kiosk and restart it when it crashes or hangs")
+    parser.add_argument("--kiosk", default=KIOSK_SCRIPT)
+    parser.add_argument("--hang-timeout", type=float, default=HANG_TIMEOUT)
+    parser.add_argument("--heartbeat", default=HEARTBEAT_FILE)
+    parser.add_argument("--demo", action="store_true",
+                        help="drive the kiosk with synthetic visitors (see stations.py)")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    kiosk_path = os.path.join(here, args.kiosk)
+    if args.demo:
+        command = [sys.executable, os.path.join(here, "stations.py"), "--demo-station", kiosk_path, "0"]
+    else:
+        command = [sys.executable, kiosk_path]
+
+    supervisor = Supervisor(command, args.heartbeat, args.hang_timeout)
+    # Stopping the watchdog (e.g. from stations.py) stops the kiosk with it
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        supervisor.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(supervisor.report())
+
+
+if __name__=="__main__":
+    main()